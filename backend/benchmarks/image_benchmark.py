@@ -0,0 +1,62 @@
+"""Throughput of image variant rendering: every variant of a photo-sized
+upload, encoded as WebP and JPEG, serially in the event loop's process
+versus fanned out over the ProcessPoolExecutor the API uses.
+
+    cd backend && python benchmarks/image_benchmark.py [images] [workers]
+"""
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import io
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw
+from typing import List
+
+from config import settings
+from services.image_service import render_variants, VARIANT_SIZES
+
+render = partial(render_variants, max_pixels=settings.image_max_pixels)
+
+def sample_image(index: int, size=(3000, 2000)) -> bytes:
+    """A JPEG with enough detail that encoding is not trivially cheap"""
+    image = Image.new("RGB", size, (index * 37 % 256, 90, 160))
+    draw = ImageDraw.Draw(image)
+    for step in range(0, size[0], 40):
+        draw.line([(step, 0), (size[0] - step, size[1])], fill=((step + index) % 256, 200, step % 256), width=7)
+        draw.ellipse([step, step % size[1], step + 120, step % size[1] + 80], outline=(255, step % 256, 0), width=3)
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=90)
+    return output.getvalue()
+
+def report(label: str, count: int, seconds: float, cores: int):
+    rate = count / seconds
+    print(f"{label:<22} {seconds * 1000 / count:>9.1f} ms/image {rate:>8.2f} images/s {rate / cores:>8.2f} images/s/core")
+
+def main(count: int, workers: int):
+    cores = os.cpu_count() or 1
+    images: List[bytes] = [sample_image(i) for i in range(count)]
+    print(f"{count} images of 3000x2000, variants {', '.join(VARIANT_SIZES)} as WebP + JPEG, {cores} cores\n")
+
+    render(images[0])  # warm up codecs
+    started = time.perf_counter()
+    for data in images:
+        render(data)
+    report("serial", count, time.perf_counter() - started, 1)
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+        list(pool.map(render, images[:workers]))  # start the workers
+        started = time.perf_counter()
+        list(pool.map(render, images))
+        report(f"pool ({workers} workers)", count, time.perf_counter() - started, min(workers, cores))
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+        int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    )
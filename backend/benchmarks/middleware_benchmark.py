@@ -0,0 +1,111 @@
+"""Requests per second on /api/health with the old BaseHTTPMiddleware-based
+AnalyticsMiddleware versus the pure ASGI one.
+
+Requests are driven straight through the ASGI interface (no sockets), so
+the numbers isolate framework and middleware overhead.
+
+    cd backend && python benchmarks/middleware_benchmark.py [requests]
+"""
+from pathlib import Path
+import asyncio
+import logging
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI, APIRouter
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from config import settings
+from server import AnalyticsMiddleware, health_check, metrics_registry
+from services.analytics_service import analytics_aggregator
+
+class LegacyAnalyticsMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, kept here for comparison"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.perf_counter()
+
+        if request.method == "GET":
+            analytics_aggregator.increment("page_views")
+            analytics_aggregator.add_visitor(AnalyticsMiddleware.client_fingerprint(request.scope))
+
+        response = await call_next(request)
+
+        process_time = time.perf_counter() - start_time
+        route = request.scope.get("route")
+        metrics_registry.observe(
+            route.path if route else "<unmatched>",
+            request.method,
+            response.status_code,
+            process_time
+        )
+        logging.getLogger("access").info(
+            "%s %s - %s - %.3fs", request.method, request.url.path, response.status_code, process_time
+        )
+        return response
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI()
+    router = APIRouter(prefix=settings.api_prefix)
+    router.get("/health")(health_check)
+    app.include_router(router)
+    app.add_middleware(middleware)
+    return app
+
+async def drive(app: FastAPI, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"{settings.api_prefix}/health",
+        "raw_path": f"{settings.api_prefix}/health".encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    def make_receive():
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Like a real server, block until the client disconnects
+            await asyncio.Event().wait()
+
+        return receive
+
+    async def send(message):
+        pass
+
+    # Warm up routing and model caches before timing
+    for _ in range(200):
+        await app(dict(scope), make_receive(), send)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), make_receive(), send)
+    return requests / (time.perf_counter() - start)
+
+async def main(requests: int):
+    # Keep log I/O out of the measurement for both variants
+    logging.disable(logging.INFO)
+
+    before = await drive(build_app(LegacyAnalyticsMiddleware), requests)
+    after = await drive(build_app(AnalyticsMiddleware), requests)
+
+    print(f"{'BaseHTTPMiddleware':<20} {before:>10,.0f} req/s")
+    print(f"{'pure ASGI':<20} {after:>10,.0f} req/s")
+    print(f"{'speedup':<20} {after / before:>10.2f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
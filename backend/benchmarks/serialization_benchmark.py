@@ -0,0 +1,101 @@
+"""Per-row cost of turning MongoDB documents into a JSON response body,
+before and after the trusted read path.
+
+before: validate every document into its model, then let FastAPI validate
+        and serialize the list again against ``response_model`` and render
+        it with the stdlib-backed JSONResponse
+after:  encode the projected documents straight to bytes with ``dumps``
+
+    cd backend && python benchmarks/serialization_benchmark.py [rows]
+"""
+from pathlib import Path
+import asyncio
+import sys
+import time
+import uuid
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from datetime import datetime, date, timedelta
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from starlette.responses import JSONResponse
+from typing import Any, Callable, Dict, List
+
+from models import (
+    ContactForm, Portfolio, Booking, ChatMessage, Service, Testimonial,
+    ContactStatus, BookingStatus, ServiceType
+)
+from services.serialization import dumps, model_projection
+
+def _base(index: int) -> Dict[str, Any]:
+    created_at = datetime(2024, 1, 1) + timedelta(minutes=index)
+    return {"id": str(uuid.uuid4()), "created_at": created_at, "updated_at": created_at}
+
+SAMPLES: Dict[type, Callable[[int], Dict[str, Any]]] = {
+    ContactForm: lambda i: {
+        **_base(i), "name": f"Lead {i}", "email": f"lead{i}@example.com", "phone": "+1 555 0100",
+        "service": ServiceType.SEO.value, "message": "We would like to grow our organic traffic. " * 4,
+        "status": ContactStatus.NEW.value, "status_changed_at": datetime(2024, 1, 1),
+        "assigned_to": None, "notes": ["called", "sent proposal"],
+    },
+    Portfolio: lambda i: {
+        **_base(i), "title": f"Project {i}", "description": "Full-funnel campaign rebuild. " * 8,
+        "client_name": "Acme", "service_type": ServiceType.LEAD_GENERATION.value, "project_duration": "3 months",
+        "results": ["+120% leads", "-35% CPA"], "images": [], "technologies": ["React", "FastAPI", "MongoDB"],
+        "testimonial": None, "is_featured": i % 10 == 0,
+    },
+    Booking: lambda i: {
+        **_base(i), "user_id": f"user-{i % 50}", "service_type": ServiceType.WEB_DEVELOPMENT.value,
+        "preferred_date": date(2024, 2, 1), "preferred_time": "10:00", "duration": 60,
+        "description": "Kick-off call", "status": BookingStatus.PENDING.value, "confirmed_date": None,
+        "meeting_link": None, "notes": None,
+    },
+    ChatMessage: lambda i: {
+        **_base(i), "session_id": "session-1", "user_id": None, "message": "What does SEO cost?",
+        "response": "It depends on the scope of the engagement. " * 6, "is_from_user": True,
+        "metadata": {"model": "gpt-4o", "tokens": 120},
+    },
+    Service: lambda i: {
+        **_base(i), "title": f"Service {i}", "description": "What we do and how. " * 6, "icon": "search",
+        "features": ["Audit", "Keyword research", "Reporting"], "price_range": "$1k-$5k",
+        "is_active": True, "category": ServiceType.SEO.value,
+    },
+    Testimonial: lambda i: {
+        **_base(i), "name": f"Client {i}", "company": "Acme", "position": "CMO",
+        "text": "They doubled our pipeline in a quarter. " * 3, "rating": 5, "image": None,
+        "is_featured": False,
+    },
+}
+
+def before(model: type, docs: List[Dict[str, Any]], field) -> bytes:
+    items = [model(**doc) for doc in docs]
+    content = asyncio.run(serialize_response(field=field, response_content=items))
+    return JSONResponse(content).body
+
+def after(model: type, docs: List[Dict[str, Any]], field) -> bytes:
+    return dumps(docs)
+
+def per_row_us(fn, model: type, docs: List[Dict[str, Any]], field, repeat: int = 5) -> float:
+    fn(model, docs, field)  # warm up validators and caches
+    best = min(_timed(fn, model, docs, field) for _ in range(repeat))
+    return best / len(docs) * 1e6
+
+def _timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def main(rows: int):
+    print(f"{'model':<14} {'before':>12} {'after':>12} {'speedup':>9}")
+    for model, sample in SAMPLES.items():
+        projection = model_projection(model)
+        docs = [{key: value for key, value in sample(i).items() if key in projection} for i in range(rows)]
+        field = create_response_field(name=f"Response_{model.__name__}", type_=List[model])
+
+        before_us = per_row_us(before, model, docs, field)
+        after_us = per_row_us(after, model, docs, field)
+        print(f"{model.__name__:<14} {before_us:>9.2f} us {after_us:>9.2f} us {before_us / after_us:>8.1f}x")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Dict
 import os
 
 class Settings(BaseSettings):
@@ -16,6 +16,20 @@ class Settings(BaseSettings):
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     default_ai_model: str = os.getenv("DEFAULT_AI_MODEL", "gpt-4o")
     ai_provider: str = os.getenv("AI_PROVIDER", "openai")
+    chat_pool_max_sessions: int = int(os.getenv("CHAT_POOL_MAX_SESSIONS", "500"))  # live chat clients kept
+    chat_pool_max_bytes: int = int(os.getenv("CHAT_POOL_MAX_BYTES", str(64 * 1024 * 1024)))  # prompt/history text they hold
+    chat_pool_idle_ttl: int = int(os.getenv("CHAT_POOL_IDLE_TTL", "1800"))  # seconds before an idle session is dropped
+    chat_pool_max_idle_shared: int = 4  # idle one-shot clients kept per system message
+    # Seconds a one-shot response is reused, per endpoint
+    ai_cache_ttls: Dict[str, int] = {
+        "content": 24 * 60 * 60,
+        "recommendations": 7 * 24 * 60 * 60,
+        "market_trends": 24 * 60 * 60,
+        "strategy": 7 * 24 * 60 * 60,
+        "default": 24 * 60 * 60,
+    }
+    ai_cache_memory_ttl: int = 60 * 60  # cap on the per-process copy
+    ai_cache_max_entries: int = 1000
     
     # Security
     jwt_secret: str = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
@@ -32,14 +46,47 @@ class Settings(BaseSettings):
     api_prefix: str = "/api"
     debug: bool = os.getenv("DEBUG", "false").lower() == "true"
     
+    # Exports
+    export_batch_size: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    
+    # Logging
+    log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_format: str = os.getenv("LOG_FORMAT", "json")  # json or text
+    access_log_sample_rate: float = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    access_log_error_sample_rate: float = float(os.getenv("ACCESS_LOG_ERROR_SAMPLE_RATE", "1.0"))
+    access_log_route_sample_rates: Dict[str, float] = {
+        "/api/health": 0.01,
+        "/api/metrics": 0.0,
+    }
+    
     # File Upload
     max_file_size: int = 10 * 1024 * 1024  # 10MB
     allowed_file_types: List[str] = ["image/jpeg", "image/png", "image/gif", "application/pdf"]
+    max_upload_files: int = 10  # files per /uploads request
+    media_bucket: str = os.getenv("MEDIA_BUCKET", "media")  # GridFS bucket of content-addressed blobs
+    media_chunk_size: int = 255 * 1024
+    image_workers: int = int(os.getenv("IMAGE_WORKERS", "2"))  # processes rendering image variants
+    image_max_pixels: int = int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000)))  # larger originals get no variants
     
     # Rate Limiting
     rate_limit_requests: int = 100
     rate_limit_period: int = 60  # seconds
     
+    # Analytics
+    analytics_flush_interval: float = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "5"))  # seconds
+    analytics_flush_threshold: int = int(os.getenv("ANALYTICS_FLUSH_THRESHOLD", "1000"))
+    counters_reconcile_interval: float = float(os.getenv("COUNTERS_RECONCILE_INTERVAL", "3600"))  # seconds
+    
+    # Caching
+    admin_cache_max_entries: int = int(os.getenv("ADMIN_CACHE_MAX_ENTRIES", "1024"))
+    admin_cache_ttl: float = float(os.getenv("ADMIN_CACHE_TTL", "10"))  # seconds
+    analytics_summary_cache_ttl: float = float(os.getenv("ANALYTICS_SUMMARY_CACHE_TTL", "5"))  # seconds
+    catalog_cache_max_age: int = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))  # seconds
+    catalog_stale_while_revalidate: int = int(os.getenv("CATALOG_STALE_WHILE_REVALIDATE", "300"))  # seconds
+    catalog_cache_max_entries: int = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "256"))
+    catalog_cache_ttl: float = float(os.getenv("CATALOG_CACHE_TTL", "300"))  # seconds
+    change_streams_enabled: bool = os.getenv("CHANGE_STREAMS_ENABLED", "true").lower() == "true"
+    
     # Email Templates
     email_templates_dir: str = "email_templates"
     
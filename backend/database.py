@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from config import settings
+from query_shapes import derive_indexes
 import logging
 from typing import Optional
 
@@ -34,47 +35,43 @@ async def close_db_connection():
         db.client.close()
         logger.info("Disconnected from MongoDB")
 
+# Indexes that are not derived from query shapes: uniqueness constraints
+# and lookups outside the API's list/filter endpoints
+EXPLICIT_INDEXES = [
+    ("contact_forms", [("email", 1)], {}),
+    ("users", [("email", 1)], {"unique": True}),
+    ("users", [("role", 1)], {}),
+    ("bookings", [("preferred_date", 1)], {}),
+    ("chat_sessions", [("session_id", 1)], {"unique": True}),
+    ("chat_sessions", [("user_id", 1)], {}),
+    ("contact_transitions", [("contact_id", 1)], {}),
+    ("contact_transitions", [("created_at", 1)], {}),
+    ("analytics", [("analytics_date", 1)], {"unique": True}),
+    # Search: one weighted text index per collection for full-text mode
+    # (prefix mode's search_terms indexes are derived from QUERY_SHAPES)
+    ("contact_forms", [("name", "text"), ("email", "text"), ("message", "text")],
+     {"name": "contact_forms_search", "weights": {"name": 10, "email": 5, "message": 1}}),
+    ("portfolio", [("title", "text"), ("technologies", "text"), ("description", "text")],
+     {"name": "portfolio_search", "weights": {"title": 10, "technologies": 5, "description": 1}}),
+    # One blob per content hash in the media GridFS bucket
+    (f"{settings.media_bucket}.files", [("filename", 1)], {"unique": True}),
+    # Cached AI responses are deleted once they expire
+    ("ai_response_cache", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+]
+
 async def create_indexes():
     """Create database indexes for better performance"""
     try:
-        # Contact forms indexes
-        await db.db.contact_forms.create_index("email")
-        await db.db.contact_forms.create_index("status")
-        await db.db.contact_forms.create_index("created_at")
-        
-        # Users indexes
-        await db.db.users.create_index("email", unique=True)
-        await db.db.users.create_index("role")
-        
-        # Portfolio indexes
-        await db.db.portfolio.create_index("service_type")
-        await db.db.portfolio.create_index("is_featured")
-        await db.db.portfolio.create_index("created_at")
-        
-        # Bookings indexes
-        await db.db.bookings.create_index("user_id")
-        await db.db.bookings.create_index("status")
-        await db.db.bookings.create_index("preferred_date")
-        
-        # Chat messages indexes
-        await db.db.chat_messages.create_index("session_id")
-        await db.db.chat_messages.create_index("user_id")
-        await db.db.chat_messages.create_index("created_at")
-        
-        # Chat sessions indexes
-        await db.db.chat_sessions.create_index("session_id", unique=True)
-        await db.db.chat_sessions.create_index("user_id")
-        
-        # Services indexes
-        await db.db.services.create_index("category")
-        await db.db.services.create_index("is_active")
-        
-        # Testimonials indexes
-        await db.db.testimonials.create_index("is_featured")
-        await db.db.testimonials.create_index("rating")
+        explicit = set()
+        for collection, keys, options in EXPLICIT_INDEXES:
+            await db.db[collection].create_index(keys, **options)
+            explicit.add((collection, tuple(keys)))
         
-        # Analytics indexes
-        await db.db.analytics.create_index("analytics_date", unique=True)
+        # Compound indexes matching each endpoint's filter and sort
+        for collection, indexes in derive_indexes().items():
+            for keys in indexes:
+                if (collection, keys) not in explicit:
+                    await db.db[collection].create_index(list(keys))
         
         logger.info("Database indexes created successfully")
         
@@ -0,0 +1,102 @@
+from logging.handlers import QueueHandler, QueueListener
+from config import settings
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import logging
+import queue
+import random
+import json
+import sys
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class LocalQueueHandler(QueueHandler):
+    """QueueHandler that leaves all formatting to the listener thread.
+
+    The stock ``prepare`` formats the record up front so it can be pickled;
+    the queue here never leaves the process, so the record is passed as-is.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class AccessLogSampler:
+    """Decides which access-log lines are written.
+
+    Server errors use ``error_rate``; everything else uses the rate
+    configured for the route template, or ``default_rate``.
+    """
+
+    def __init__(self, default_rate: float, route_rates: Dict[str, float], error_rate: float):
+        self.default_rate = default_rate
+        self.route_rates = route_rates
+        self.error_rate = error_rate
+
+    def should_log(self, route: str, status_code: int) -> bool:
+        if status_code >= 500:
+            rate = self.error_rate
+        else:
+            rate = self.route_rates.get(route, self.default_rate)
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+_listener: Optional[QueueListener] = None
+_previous_handlers: List[logging.Handler] = []
+
+def setup_logging() -> None:
+    """Route all logging through a queue drained by a background thread.
+
+    Safe to call again, e.g. on each startup after ``stop_logging()``.
+    """
+    global _listener, _previous_handlers
+    if _listener:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    if settings.log_format == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    _previous_handlers = root.handlers
+    root.handlers = [LocalQueueHandler(log_queue)]
+    root.setLevel(settings.log_level.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging() -> None:
+    """Flush queued records, stop the background thread and restore the
+    handlers ``setup_logging()`` replaced, so later records are not queued
+    with nothing left to write them"""
+    global _listener
+    if _listener:
+        logging.getLogger().handlers = _previous_handlers
+        _listener.stop()
+        _listener = None
+
+# Create global access log sampler instance
+access_log_sampler = AccessLogSampler(
+    default_rate=settings.access_log_sample_rate,
+    route_rates=settings.access_log_route_sample_rates,
+    error_rate=settings.access_log_error_sample_rate
+)
@@ -0,0 +1,272 @@
+"""Maintenance commands.
+
+    cd backend && python manage.py --help
+"""
+from motor.motor_asyncio import AsyncIOMotorClient
+from config import settings
+from database import db, connect_to_db, close_db_connection, create_indexes
+from models import ContactStatus, BookingStatus, SearchScope, ServiceType
+from query_shapes import QUERY_SHAPES, QueryShape
+from services.search_service import search_terms
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+import asyncio
+import random
+import uuid
+import typer
+
+app = typer.Typer(help="NOWHERE Digital API maintenance commands")
+
+# Plan stages that mean a shape is not served by an index
+PROBLEM_STAGES = {"COLLSCAN", "SORT"}
+
+def _seed_document(collection: str, index: int) -> Dict[str, Any]:
+    created_at = datetime.utcnow() - timedelta(minutes=index)
+    doc = {"id": str(uuid.uuid4()), "created_at": created_at, "updated_at": created_at}
+    service = random.choice(list(ServiceType)).value
+
+    if collection == "contact_forms":
+        doc.update(status=random.choice(list(ContactStatus)).value, service=service, email=f"lead{index}@example.com")
+        doc["search_terms"] = search_terms(SearchScope.CONTACTS, doc)
+    elif collection == "bookings":
+        doc.update(user_id=f"user-{index % 500}", status=random.choice(list(BookingStatus)).value, service_type=service)
+    elif collection == "portfolio":
+        doc.update(service_type=service, is_featured=index % 10 == 0, title=f"Project {index}")
+        doc["search_terms"] = search_terms(SearchScope.PORTFOLIO, doc)
+    elif collection == "testimonials":
+        doc.update(rating=random.randint(1, 5), is_featured=index % 10 == 0)
+    elif collection == "services":
+        doc.update(category=service, is_active=index % 5 != 0)
+    elif collection == "chat_messages":
+        doc.update(session_id=f"session-{index % 200}")
+    elif collection == "chat_sessions":
+        doc.update(session_id=f"session-{index}")
+    elif collection == "analytics":
+        doc = {"analytics_date": (created_at.date() - timedelta(days=index)).isoformat(), "page_views": index}
+    elif collection == "funnel_daily":
+        day = (created_at.date() - timedelta(days=index // len(ServiceType))).isoformat()
+        doc = {"_id": f"{day}:{index}", "funnel_date": day, "service": service}
+    return doc
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    """Stage names of a winning plan, outermost first"""
+    if "queryPlan" in plan:
+        plan = plan["queryPlan"]
+    stage = plan.get("stage", "?")
+    if stage == "IXSCAN":
+        stage = f"IXSCAN({plan.get('indexName')})"
+    stages = [stage]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+async def _sample_query(database, shape: QueryShape) -> Dict[str, Any]:
+    sample = await database[shape.collection].find_one({}) or {}
+    query: Dict[str, Any] = {field: sample.get(field) for field in shape.equality}
+    for field in shape.range:
+        value = sample.get(field)
+        if isinstance(value, list):
+            # Multikey fields, e.g. search_terms; bound on one element
+            value = value[0] if value else None
+        query[field] = {"$gte": value}
+    return query
+
+async def _advise_indexes(db_name: str, seed: int, with_indexes: bool) -> int:
+    db.client = AsyncIOMotorClient(settings.mongo_url)
+    db.db = db.client[db_name]
+    try:
+        collections = sorted({shape.collection for shape in QUERY_SHAPES})
+        if seed:
+            for collection in collections:
+                await db.db[collection].drop()
+                docs = [_seed_document(collection, index) for index in range(seed)]
+                await db.db[collection].insert_many(docs)
+            typer.echo(f"Seeded {seed} documents into each of {len(collections)} collections in '{db_name}'")
+        if with_indexes:
+            await create_indexes()
+
+        problems = 0
+        for shape in QUERY_SHAPES:
+            query = await _sample_query(db.db, shape)
+            find = db.db[shape.collection].find(query)
+            if shape.sort:
+                find = find.sort(list(shape.sort))
+            explain = await find.limit(20).explain()
+            stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+
+            flagged = PROBLEM_STAGES.intersection(stages)
+            problems += bool(flagged)
+            status = "WARN" if flagged else "OK"
+            typer.echo(f"{status:<5} {shape.name:<48} {' <- '.join(stages)}")
+            if flagged:
+                typer.echo(f"      suggested index on {shape.collection}: {list(shape.index_keys())}")
+
+        typer.echo(f"{problems} of {len(QUERY_SHAPES)} query shapes need attention")
+        return problems
+    finally:
+        db.client.close()
+
+@app.command("advise-indexes")
+def advise_indexes(
+    db_name: str = typer.Option(f"{settings.db_name}_index_advisor", help="Scratch database to seed and explain against"),
+    seed: int = typer.Option(5000, help="Documents to seed per collection (0 to use existing data)"),
+    with_indexes: bool = typer.Option(True, help="Create the derived indexes before explaining"),
+):
+    """Explain every registered query shape and flag COLLSCAN or in-memory SORT stages"""
+    if seed and db_name == settings.db_name:
+        raise typer.BadParameter("refusing to seed (and drop) the application database", param_hint="--db-name")
+    problems = asyncio.run(_advise_indexes(db_name, seed, with_indexes))
+    raise typer.Exit(code=1 if problems else 0)
+
+@app.command("reconcile-counters")
+def reconcile_counters():
+    """Recount the materialized analytics totals from source"""
+    from services.counters_service import counters_service
+
+    async def run():
+        await connect_to_db()
+        try:
+            return await counters_service.reconcile()
+        finally:
+            await close_db_connection()
+
+    typer.echo(asyncio.run(run()))
+
+@app.command("index-search")
+def index_search(
+    batch_size: int = typer.Option(500, help="Documents per bulk write"),
+):
+    """Backfill the search_terms used by /api/search prefix mode"""
+    from pymongo import UpdateOne
+    from services.search_service import SEARCH_TARGETS
+
+    async def run():
+        await connect_to_db()
+        try:
+            for scope, target in SEARCH_TARGETS.items():
+                projection = {"_id": 1, **{field: 1 for field in target.term_fields}}
+                updates, total = [], 0
+                async for doc in db.db[target.collection].find({}, projection):
+                    updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_terms": search_terms(scope, doc)}}))
+                    if len(updates) >= batch_size:
+                        await db.db[target.collection].bulk_write(updates, ordered=False)
+                        total += len(updates)
+                        updates = []
+                if updates:
+                    await db.db[target.collection].bulk_write(updates, ordered=False)
+                    total += len(updates)
+                typer.echo(f"{target.collection}: indexed {total} documents")
+        finally:
+            await close_db_connection()
+
+    asyncio.run(run())
+
+@app.command("migrate-media")
+def migrate_media(
+    batch_size: int = typer.Option(50, help="Documents read and rewritten per batch"),
+):
+    """Move inline base64 images out of portfolio and testimonials into the media store"""
+    from pymongo import UpdateOne
+    from services.catalog_service import catalog_versions
+    from services.media_service import media_store, MediaTypeNotAllowedError, IMAGE_FIELDS
+
+    async def run():
+        await connect_to_db()
+        try:
+            for collection, fields in IMAGE_FIELDS.items():
+                migrated, last_id = 0, None
+                while True:
+                    # Page by _id so each batch is a fresh, bounded query
+                    query = {"_id": {"$gt": last_id}} if last_id else {}
+                    projection = {"_id": 1, **{field: 1 for field in fields}}
+                    docs = await db.db[collection].find(query, projection).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+                    if not docs:
+                        break
+                    last_id = docs[-1]["_id"]
+
+                    updates = []
+                    for doc in docs:
+                        try:
+                            externalized = await media_store.externalize_fields(doc, fields)
+                        except MediaTypeNotAllowedError as e:
+                            typer.echo(f"{collection} {doc['_id']}: left inline, {e}")
+                            continue
+                        changed = {field: value for field, value in externalized.items() if value != doc.get(field)}
+                        if changed:
+                            # Only rewrite documents nobody changed meanwhile
+                            original = {field: doc.get(field) for field in changed}
+                            updates.append(UpdateOne({"_id": doc["_id"], **original}, {"$set": changed}))
+                    if updates:
+                        result = await db.db[collection].bulk_write(updates, ordered=False)
+                        migrated += result.modified_count
+                if migrated:
+                    # Cached responses and ETags still describe the inline images
+                    await catalog_versions.bump(collection)
+                typer.echo(f"{collection}: moved images out of {migrated} documents")
+        finally:
+            await close_db_connection()
+
+    asyncio.run(run())
+
+@app.command("render-variants")
+def render_variants():
+    """Generate thumbnail and responsive variants of every stored portfolio and testimonial image"""
+    from services.image_service import image_pipeline
+    from services.media_service import media_digests, IMAGE_FIELDS
+
+    async def run():
+        await connect_to_db()
+        try:
+            for collection, fields in IMAGE_FIELDS.items():
+                digests = []
+                async for doc in db.db[collection].find({}, {"_id": 0, **{field: 1 for field in fields}}):
+                    digests.extend(digest for digest in media_digests(doc, fields) if digest not in digests)
+                # Already rendered images are skipped
+                await image_pipeline.process_all(digests)
+                typer.echo(f"{collection}: {len(digests)} images checked")
+        finally:
+            image_pipeline.shutdown()
+            await close_db_connection()
+
+    asyncio.run(run())
+
+@app.command("watch-catalog")
+def watch_catalog():
+    """Follow catalog invalidations as a worker would and print them.
+
+    Needs change streams, e.g. a local single-node replica set:
+
+        mongod --replSet rs0 --dbpath /tmp/rs0 &
+        mongosh --eval 'rs.initiate()'
+        MONGO_URL='mongodb://localhost:27017/?replicaSet=rs0' python manage.py watch-catalog
+
+    then create or update a service, portfolio item or testimonial through
+    the API (or mongosh) in another shell.
+    """
+    from services.catalog_service import catalog_versions
+    from services.change_stream_service import catalog_change_listener
+    from services.invalidation_bus import invalidation_bus
+
+    async def run():
+        await connect_to_db()
+        try:
+            await catalog_versions.load()
+            invalidation_bus.subscribe(lambda event: typer.echo(
+                f"{event.collection}: version={event.version} updated_at={event.updated_at}"
+            ))
+            await catalog_change_listener.start()
+            typer.echo(f"Listening in {catalog_change_listener.mode} mode, Ctrl+C to stop")
+            await asyncio.Event().wait()
+        finally:
+            await catalog_change_listener.stop()
+            await close_db_connection()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    app()
@@ -43,6 +43,35 @@ class UserRole(str, Enum):
     CLIENT = "client"
     STAFF = "staff"
 
+class AnalyticsMetric(str, Enum):
+    PAGE_VIEWS = "page_views"
+    CONTACT_FORMS = "contact_forms"
+    BOOKINGS = "bookings"
+    CHAT_SESSIONS = "chat_sessions"
+
+class ExportCollection(str, Enum):
+    CONTACTS = "contacts"
+    BOOKINGS = "bookings"
+    CHATS = "chats"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class SearchScope(str, Enum):
+    CONTACTS = "contacts"
+    PORTFOLIO = "portfolio"
+
+class SearchMode(str, Enum):
+    FULL = "full"
+    PREFIX = "prefix"
+
+class TimeGranularity(str, Enum):
+    HOURLY = "hourly"
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
 # Base Models
 class BaseDocument(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -57,6 +86,7 @@ class ContactForm(BaseDocument):
     service: ServiceType
     message: str
     status: ContactStatus = ContactStatus.NEW
+    status_changed_at: datetime = Field(default_factory=datetime.utcnow)
     assigned_to: Optional[str] = None
     notes: List[str] = []
 
@@ -112,7 +142,7 @@ class Portfolio(BaseDocument):
     service_type: ServiceType
     project_duration: str
     results: List[str]
-    images: List[str]  # Base64 encoded images
+    images: List[str]  # /api/media/{sha256} URLs (base64 accepted on input)
     technologies: List[str]
     testimonial: Optional[str] = None
     is_featured: bool = False
@@ -141,6 +171,9 @@ class PortfolioUpdate(BaseModel):
     testimonial: Optional[str] = None
     is_featured: Optional[bool] = None
 
+# Heavy fields left out of the portfolio list's default summary view
+PORTFOLIO_SUMMARY_EXCLUDE = ["images"]
+
 # Booking Models
 class Booking(BaseDocument):
     user_id: str
@@ -236,7 +269,7 @@ class Testimonial(BaseDocument):
     position: Optional[str] = None
     text: str
     rating: int = Field(ge=1, le=5)
-    image: Optional[str] = None  # Base64 encoded image
+    image: Optional[str] = None  # /api/media/{sha256} URL (base64 accepted on input)
     is_featured: bool = False
 
 class TestimonialCreate(BaseModel):
@@ -257,6 +290,9 @@ class TestimonialUpdate(BaseModel):
     image: Optional[str] = None
     is_featured: Optional[bool] = None
 
+# Heavy fields left out of the testimonial list's default summary view
+TESTIMONIAL_SUMMARY_EXCLUDE = ["image"]
+
 # Analytics Models
 class Analytics(BaseDocument):
     page_views: int = 0
@@ -264,6 +300,7 @@ class Analytics(BaseDocument):
     contact_forms: int = 0
     bookings: int = 0
     chat_sessions: int = 0
+    hourly: Dict[str, Dict[str, int]] = {}  # counter -> zero-padded hour -> count
     analytics_date: str = Field(default_factory=lambda: date.today().isoformat())
 
 # Email Templates
@@ -282,8 +319,9 @@ class StandardResponse(BaseModel):
 
 class PaginatedResponse(BaseModel):
     items: List[Any]
-    total: int
+    total: Optional[int] = None  # omitted where counting costs as much as the query
     page: int
     per_page: int
     has_next: bool
-    has_prev: bool
\ No newline at end of file
+    has_prev: bool
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+IndexKeys = Tuple[Tuple[str, int], ...]
+
+# Sort orders used by the list endpoints; the trailing unique ``id`` makes
+# every position in the order unambiguous
+NEWEST_FIRST = (("created_at", -1), ("id", -1))
+OLDEST_FIRST = (("created_at", 1), ("id", 1))
+HIGHEST_RATED = (("rating", -1), ("id", -1))
+
+@dataclass(frozen=True)
+class QueryShape:
+    """The filter and sort an endpoint sends to one collection"""
+    name: str
+    collection: str
+    equality: Tuple[str, ...] = ()
+    sort: IndexKeys = ()
+    range: Tuple[str, ...] = ()
+
+    def index_keys(self) -> IndexKeys:
+        """Compound index serving the shape: equality, then sort, then range fields"""
+        keys = [(field, 1) for field in self.equality]
+        keys += [(field, direction) for field, direction in self.sort if field not in self.equality]
+        keys += [(field, 1) for field in self.range if field not in self.equality]
+        return tuple(keys)
+
+# Every find() the API issues, one entry per combination of optional filters
+QUERY_SHAPES: List[QueryShape] = [
+    # Contact forms
+    QueryShape("get_contact_forms", "contact_forms", sort=NEWEST_FIRST),
+    QueryShape("get_contact_forms?status", "contact_forms", ("status",), NEWEST_FIRST),
+    QueryShape("update_contact_form", "contact_forms", ("id",)),
+
+    # Bookings
+    QueryShape("get_bookings", "bookings", sort=NEWEST_FIRST),
+    QueryShape("get_bookings?status", "bookings", ("status",), NEWEST_FIRST),
+    QueryShape("get_bookings?user_id", "bookings", ("user_id",), NEWEST_FIRST),
+    QueryShape("get_bookings?user_id&status", "bookings", ("user_id", "status"), NEWEST_FIRST),
+
+    # Portfolio
+    QueryShape("get_portfolio_items", "portfolio", sort=NEWEST_FIRST),
+    QueryShape("get_portfolio_items?service_type", "portfolio", ("service_type",), NEWEST_FIRST),
+    QueryShape("get_portfolio_items?is_featured", "portfolio", ("is_featured",), NEWEST_FIRST),
+    QueryShape("get_portfolio_items?service_type&is_featured", "portfolio", ("service_type", "is_featured"), NEWEST_FIRST),
+    QueryShape("update_portfolio_item", "portfolio", ("id",)),
+    QueryShape("get_portfolio_item", "portfolio", ("id",)),
+
+    # Testimonials
+    QueryShape("get_testimonials", "testimonials", sort=HIGHEST_RATED),
+    QueryShape("get_testimonials?is_featured", "testimonials", ("is_featured",), HIGHEST_RATED),
+    QueryShape("get_testimonial", "testimonials", ("id",)),
+
+    # Services
+    QueryShape("get_services?is_active", "services", ("is_active",), (("created_at", -1),)),
+    QueryShape("get_services?category&is_active", "services", ("category", "is_active"), (("created_at", -1),)),
+
+    # Chat
+    QueryShape("get_chat_history", "chat_messages", ("session_id",), OLDEST_FIRST),
+    QueryShape("export_data/chats", "chat_messages", sort=OLDEST_FIRST),
+    QueryShape("export_data/chats?user_id", "chat_messages", ("user_id",), OLDEST_FIRST),
+    QueryShape("send_chat_message", "chat_sessions", ("session_id",)),
+
+    # Search, prefix mode: the regexes on the multikey search_terms array go
+    # after the sort keys, so the index returns matches already in order
+    QueryShape("search?mode=prefix&scope=contacts", "contact_forms", sort=NEWEST_FIRST, range=("search_terms",)),
+    QueryShape("search?mode=prefix&scope=portfolio", "portfolio", sort=NEWEST_FIRST, range=("search_terms",)),
+
+    # Analytics
+    QueryShape("get_analytics_timeseries", "analytics", range=("analytics_date",)),
+    QueryShape("get_funnel_analytics", "funnel_daily", range=("funnel_date",)),
+    QueryShape("get_funnel_analytics?service", "funnel_daily", ("service",), range=("funnel_date",)),
+]
+
+def derive_indexes(shapes: List[QueryShape] = QUERY_SHAPES) -> Dict[str, List[IndexKeys]]:
+    """Minimal set of compound indexes per collection covering every shape.
+
+    An index whose keys are a prefix of another index on the same collection
+    is dropped, since MongoDB can use the longer index for it.
+    """
+    by_collection: Dict[str, List[IndexKeys]] = {}
+    for shape in shapes:
+        keys = shape.index_keys()
+        if keys:
+            by_collection.setdefault(shape.collection, []).append(keys)
+
+    derived = {}
+    for collection, candidates in by_collection.items():
+        chosen: List[IndexKeys] = []
+        for keys in sorted(set(candidates), key=len, reverse=True):
+            if not any(existing[:len(keys)] == keys for existing in chosen):
+                chosen.append(keys)
+        derived[collection] = sorted(chosen)
+    return derived
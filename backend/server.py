@@ -1,38 +1,60 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.datastructures import Headers
+from starlette.responses import Response, PlainTextResponse, StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from datetime import datetime, date
+from pymongo import ReturnDocument
 from typing import List, Optional, Dict, Any
 import logging
 from pathlib import Path
+from contextlib import aclosing
 import os
 import json
 import asyncio
+import hashlib
+import time
 import uuid
 
 # Import our modules
 from config import settings
 from database import connect_to_db, close_db_connection, get_database
+from logging_config import setup_logging, stop_logging, access_log_sampler
 from models import *
 from services.email_service import email_service
 from services.ai_service import ai_service
+from services.ai_cache_service import ai_response_cache
+from services.analytics_service import analytics_aggregator
+from services.metrics_service import metrics_registry
+from services.counters_service import counters_service, filter_count_amounts, filter_count_changes
+from services.funnel_service import funnel_service
+from services.hyperloglog import HyperLogLog
+from services.cache_service import admin_cache, render_cache_metrics
+from services.pagination import fetch_page, InvalidCursorError, NEWEST_FIRST, OLDEST_FIRST, HIGHEST_RATED
+from services.projection import build_projection, InvalidFieldsError
+from services.export_service import stream_export, MEDIA_TYPES
+from services.search_service import search, search_terms, SearchTooBroadError, SEARCH_TARGETS
+from services.catalog_service import catalog_versions, cached_catalog_response, not_modified
+from services.change_stream_service import catalog_change_listener
+from services.media_service import media_store, media_digests, media_url, MEDIA_URL_PREFIX, iter_range, parse_range, MediaNotFoundError, MediaTypeNotAllowedError, IMAGE_FIELDS
+from services.upload_service import store_uploads, UploadError
+from services.image_service import image_pipeline, choose_format, VARIANT_SIZES
+from services.timeseries import build_timeseries, MAX_HOURLY_DAYS
+from services.serialization import FastJSONResponse, model_projection, page_response, sse_event, EventStreamResponse
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+setup_logging()
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("access")
 
 # Create FastAPI app
 app = FastAPI(
     title="NOWHERE Digital API",
     description="Comprehensive digital marketing agency platform API",
     version="1.0.0",
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=FastJSONResponse
 )
 
 # Security
@@ -48,47 +70,105 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Analytics middleware
-class AnalyticsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = datetime.utcnow()
+class AnalyticsMiddleware:
+    """Times requests, tracks page views and logs API calls.
+    
+    Plain ASGI rather than BaseHTTPMiddleware: response messages pass
+    straight through to the server, so there is no extra task or memory
+    stream per request and streaming responses are not buffered. Status
+    and latency are taken from the ``http.response.start`` message.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Track page views
-        if request.method == "GET":
-            await self.track_page_view()
+        start_time = time.perf_counter()
+        method = scope["method"]
         
-        response = await call_next(request)
+        # Track page views and unique visitors; images fetched by a page are
+        # separate GETs to the media routes and not views of their own
+        if method == "GET" and not scope["path"].startswith(MEDIA_URL_PREFIX):
+            analytics_aggregator.increment("page_views")
+            analytics_aggregator.add_visitor(self.client_fingerprint(scope))
         
-        # Log API calls
-        process_time = (datetime.utcnow() - start_time).total_seconds()
-        logger.info(f"{request.method} {request.url.path} - {response.status_code} - {process_time:.3f}s")
+        response_started = False
+        
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                self.record(scope, message["status"], time.perf_counter() - start_time)
+            await send(message)
         
-        return response
-    
-    async def track_page_view(self):
         try:
-            db = get_database()
-            today = date.today().isoformat()  # Convert to string
-            
-            # Update or create today's analytics
-            await db.analytics.update_one(
-                {"analytics_date": today},
-                {"$inc": {"page_views": 1}},
-                upsert=True
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not response_started:
+                self.record(scope, 500, time.perf_counter() - start_time)
+    
+    @staticmethod
+    def record(scope: Scope, status_code: int, process_time: float):
+        # Record latency under the route template to keep label cardinality bounded
+        route = scope.get("route")
+        route_path = route.path if route else "<unmatched>"
+        metrics_registry.observe(route_path, scope["method"], status_code, process_time)
+        
+        # Log a sample of API calls
+        if access_log_sampler.should_log(route_path, status_code):
+            access_logger.info(
+                "%s %s - %s - %.3fs", scope["method"], scope["path"], status_code, process_time,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_path,
+                    "status": status_code,
+                    "duration": round(process_time, 6)
+                }
             )
-        except Exception as e:
-            logger.error(f"Error tracking page view: {e}")
+    
+    @staticmethod
+    def client_fingerprint(scope: Scope) -> bytes:
+        """Hash of the client address and user agent (never stored raw)"""
+        headers = Headers(scope=scope)
+        forwarded_for = headers.get("x-forwarded-for")
+        if forwarded_for:
+            client_ip = forwarded_for.split(",")[0].strip()
+        else:
+            client = scope.get("client")
+            client_ip = client[0] if client else ""
+        user_agent = headers.get("user-agent", "")
+        return hashlib.sha256(f"{client_ip}|{user_agent}".encode()).digest()
 
 app.add_middleware(AnalyticsMiddleware)
 
+metrics_registry.register_collector(render_cache_metrics)
+metrics_registry.register_collector(ai_service.pool.render_metrics)
+metrics_registry.register_collector(ai_response_cache.render_metrics)
+
 # Health check endpoint
 @api_router.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.utcnow(), "service": "nowhere-digital-api"}
 
+# Metrics endpoint
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request latency metrics in Prometheus text format"""
+    return PlainTextResponse(
+        metrics_registry.render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
 # Contact Form Endpoints
 @api_router.post("/contact", response_model=StandardResponse)
 async def create_contact_form(
@@ -100,27 +180,36 @@ async def create_contact_form(
         db = get_database()
         
         # Create contact form entry
-        contact_form = ContactForm(**contact_data.dict())
+        contact_form = ContactForm.model_construct(**contact_data.dict())
+        contact_doc = contact_form.dict()
         
-        # Save to database
-        await db.contact_forms.insert_one(contact_form.dict())
+        # Save to database (insert_one adds _id to the dict it is given)
+        await db.contact_forms.insert_one({
+            **contact_doc,
+            "search_terms": search_terms(SearchScope.CONTACTS, contact_doc)
+        })
         
         # Send emails in background
         background_tasks.add_task(
             email_service.send_contact_form_notification, 
-            contact_form.dict()
+            contact_doc
         )
         background_tasks.add_task(
             email_service.send_contact_confirmation, 
-            contact_form.dict()
+            contact_doc
         )
         
         # Track analytics
-        await db.analytics.update_one(
-            {"analytics_date": date.today().isoformat()},
-            {"$inc": {"contact_forms": 1}},
-            upsert=True
-        )
+        analytics_aggregator.increment("contact_forms")
+        await counters_service.increment({
+            "contacts": 1,
+            f"contacts_by_status.{contact_form.status.value}": 1,
+            **filter_count_amounts("contact_forms", contact_doc)
+        })
+        await funnel_service.record_entry(contact_form.service, contact_form.created_at)
+        admin_cache.invalidate("contacts")
+        admin_cache.invalidate("analytics")
+        admin_cache.invalidate("funnel")
         
         return StandardResponse(
             success=True,
@@ -132,11 +221,12 @@ async def create_contact_form(
         logger.error(f"Error creating contact form: {e}")
         raise HTTPException(status_code=500, detail="Failed to submit contact form")
 
-@api_router.get("/contact", response_model=List[ContactForm])
+@api_router.get("/contact", response_model=PaginatedResponse)
 async def get_contact_forms(
     status: Optional[ContactStatus] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100)
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
     """Get contact forms (admin only)"""
     try:
@@ -148,11 +238,23 @@ async def get_contact_forms(
             query["status"] = status
         
         # Get contact forms
-        cursor = db.contact_forms.find(query).skip(skip).limit(limit).sort("created_at", -1)
-        contact_forms = await cursor.to_list(length=limit)
+        async def load():
+            return await asyncio.gather(
+                fetch_page(
+                    db.contact_forms, query, NEWEST_FIRST, limit, skip=skip, cursor=cursor,
+                    projection=model_projection(ContactForm)
+                ),
+                counters_service.count("contact_forms", query)
+            )
+        
+        page, total = await admin_cache.get_or_compute(
+            ("contacts", status, skip, limit, cursor), load
+        )
         
-        return [ContactForm(**form) for form in contact_forms]
+        return page_response(page, total, limit)
         
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error getting contact forms: {e}")
         raise HTTPException(status_code=500, detail="Failed to get contact forms")
@@ -168,16 +270,47 @@ async def update_contact_form(
         
         # Update contact form
         update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
-        update_dict["updated_at"] = datetime.utcnow()
+        now = datetime.utcnow()
+        update_dict["updated_at"] = now
         
-        result = await db.contact_forms.update_one(
+        previous = await db.contact_forms.find_one_and_update(
             {"id": contact_id},
-            {"$set": update_dict}
+            {"$set": update_dict},
+            projection={"_id": 0, "status": 1, "status_changed_at": 1, "created_at": 1, "service": 1},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             raise HTTPException(status_code=404, detail="Contact form not found")
         
+        # Move the contact between status counters and record the
+        # transition for the funnel
+        old_status = previous.get("status")
+        new_status = update_dict.get("status")
+        if new_status and new_status != old_status:
+            amounts = {f"contacts_by_status.{new_status.value}": 1}
+            if old_status:
+                amounts[f"contacts_by_status.{ContactStatus(old_status).value}"] = -1
+            amounts.update(filter_count_changes("contact_forms", previous, {**previous, "status": new_status}))
+            await counters_service.increment(amounts)
+            
+            await db.contact_forms.update_one(
+                {"id": contact_id, "status": new_status},
+                {"$set": {"status_changed_at": now}}
+            )
+            if old_status:
+                await funnel_service.record_transition(
+                    contact_id,
+                    ServiceType(previous["service"]),
+                    ContactStatus(old_status),
+                    new_status,
+                    previous.get("status_changed_at") or previous.get("created_at") or now,
+                    now
+                )
+            admin_cache.invalidate("analytics")
+            admin_cache.invalidate("funnel")
+        admin_cache.invalidate("contacts")
+        
         return StandardResponse(
             success=True,
             message="Contact form updated successfully"
@@ -208,11 +341,9 @@ async def create_chat_session(
         await db.chat_sessions.insert_one(session.dict())
         
         # Track analytics
-        await db.analytics.update_one(
-            {"analytics_date": date.today().isoformat()},
-            {"$inc": {"chat_sessions": 1}},
-            upsert=True
-        )
+        analytics_aggregator.increment("chat_sessions")
+        await counters_service.increment({"chat_sessions": 1})
+        admin_cache.invalidate("analytics")
         
         return StandardResponse(
             success=True,
@@ -265,34 +396,94 @@ async def send_chat_message(
         logger.error(f"Error sending chat message: {e}")
         raise HTTPException(status_code=500, detail="Failed to send message")
 
-@api_router.get("/chat/history/{session_id}")
+@api_router.post("/chat/message/stream")
+async def stream_chat_message(
+    message_data: ChatMessageCreate
+):
+    """Send a message to AI chat and stream the response as Server-Sent Events.
+    
+    Emits ``token`` events as the model produces text, then ``done`` with
+    the stored message id, or ``error``. The exchange is saved only once the
+    response is complete; if the client disconnects first the upstream
+    generation is cancelled and nothing is saved.
+    """
+    async def events():
+        chunks = []
+        try:
+            async with aclosing(ai_service.stream_chat_message(message_data.session_id, message_data.message)) as stream:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    yield sse_event("token", {"text": chunk})
+        except Exception as e:
+            logger.error(f"Error streaming chat message: {e}")
+            yield sse_event("error", {"detail": "Failed to generate response"})
+            return
+        
+        chat_message = ChatMessage(
+            session_id=message_data.session_id,
+            user_id=message_data.user_id,
+            message=message_data.message,
+            response="".join(chunks)
+        )
+        
+        async def save():
+            db = get_database()
+            await db.chat_messages.insert_one(chat_message.dict())
+            await db.chat_sessions.update_one(
+                {"session_id": message_data.session_id},
+                {"$inc": {"total_messages": 1}}
+            )
+        
+        try:
+            # A disconnect now must not leave the message half-saved
+            await asyncio.shield(save())
+        except Exception as e:
+            logger.error(f"Error saving streamed chat message: {e}")
+            yield sse_event("error", {"detail": "Failed to save message"})
+            return
+        yield sse_event("done", {"id": chat_message.id})
+    
+    return EventStreamResponse(events())
+
+@api_router.get("/chat/history/{session_id}", response_model=PaginatedResponse)
 async def get_chat_history(
     session_id: str,
     skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100)
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
     """Get chat history for a session"""
     try:
         db = get_database()
         
         # Get chat messages
-        cursor = db.chat_messages.find(
-            {"session_id": session_id}
-        ).skip(skip).limit(limit).sort("created_at", 1)
-        
-        messages = await cursor.to_list(length=limit)
+        # The session keeps its own message count
+        page, session = await asyncio.gather(
+            fetch_page(
+                db.chat_messages, {"session_id": session_id}, OLDEST_FIRST, limit, skip=skip, cursor=cursor,
+                projection=model_projection(ChatMessage)
+            ),
+            db.chat_sessions.find_one({"session_id": session_id}, {"_id": 0, "total_messages": 1})
+        )
         
-        return [ChatMessage(**msg) for msg in messages]
+        return page_response(page, (session or {}).get("total_messages", 0), limit)
         
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error getting chat history: {e}")
         raise HTTPException(status_code=500, detail="Failed to get chat history")
 
 # Content Generation Endpoints
+def bypass_ai_cache(request: Request) -> bool:
+    """``Cache-Control: no-cache`` asks for a freshly generated response"""
+    return "no-cache" in request.headers.get("cache-control", "").lower()
+
 @api_router.post("/content/generate", response_model=StandardResponse)
 async def generate_content(
     content_request: ContentGenerationCreate,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    request: Request
 ):
     """Generate content using AI"""
     try:
@@ -301,7 +492,8 @@ async def generate_content(
         # Generate content
         generated_content = await ai_service.generate_content(
             content_request.content_type,
-            content_request.prompt
+            content_request.prompt,
+            bypass_cache=bypass_ai_cache(request)
         )
         
         # Create content record
@@ -327,11 +519,15 @@ async def generate_content(
 
 @api_router.get("/content/recommendations")
 async def get_service_recommendations(
+    request: Request,
     business_info: str = Query(..., description="Business information and needs")
 ):
     """Get AI-powered service recommendations"""
     try:
-        recommendations = await ai_service.generate_service_recommendations(business_info)
+        recommendations = await ai_service.generate_service_recommendations(
+            business_info,
+            bypass_cache=bypass_ai_cache(request)
+        )
         
         return StandardResponse(
             success=True,
@@ -346,17 +542,30 @@ async def get_service_recommendations(
 # Portfolio Endpoints
 @api_router.post("/portfolio", response_model=StandardResponse)
 async def create_portfolio_item(
-    portfolio_data: PortfolioCreate
+    portfolio_data: PortfolioCreate,
+    background_tasks: BackgroundTasks
 ):
     """Create a new portfolio item"""
     try:
         db = get_database()
         
         # Create portfolio item
-        portfolio_item = Portfolio(**portfolio_data.dict())
+        portfolio_item = Portfolio.model_construct(**portfolio_data.dict())
         
         # Save to database
-        await db.portfolio.insert_one(portfolio_item.dict())
+        portfolio_doc = portfolio_item.dict()
+        portfolio_doc.update(await media_store.externalize_fields(portfolio_doc, IMAGE_FIELDS["portfolio"]))
+        portfolio_doc["search_terms"] = search_terms(SearchScope.PORTFOLIO, portfolio_doc)
+        await db.portfolio.insert_one(portfolio_doc)
+        await counters_service.increment({
+            "portfolio_items": 1,
+            **filter_count_amounts("portfolio", portfolio_doc)
+        })
+        await catalog_versions.bump("portfolio")
+        admin_cache.invalidate("analytics")
+        
+        # Render thumbnails and responsive sizes off the request path
+        background_tasks.add_task(image_pipeline.process_all, media_digests(portfolio_doc, IMAGE_FIELDS["portfolio"]))
         
         return StandardResponse(
             success=True,
@@ -364,42 +573,83 @@ async def create_portfolio_item(
             data={"id": portfolio_item.id}
         )
         
+    except MediaTypeNotAllowedError as e:
+        raise HTTPException(status_code=415, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating portfolio item: {e}")
         raise HTTPException(status_code=500, detail="Failed to create portfolio item")
 
-@api_router.get("/portfolio", response_model=List[Portfolio])
+@api_router.get("/portfolio", response_model=PaginatedResponse)
 async def get_portfolio_items(
+    request: Request,
     service_type: Optional[ServiceType] = None,
     is_featured: Optional[bool] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=50)
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all but images)")
 ):
-    """Get portfolio items"""
+    """Get portfolio items (summary view; full items from /portfolio/{id})"""
     try:
-        db = get_database()
+        validators = catalog_versions.validators("portfolio", request)
+        if not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
         
-        # Build query
-        query = {}
-        if service_type:
-            query["service_type"] = service_type
-        if is_featured is not None:
-            query["is_featured"] = is_featured
-        
-        # Get portfolio items
-        cursor = db.portfolio.find(query).skip(skip).limit(limit).sort("created_at", -1)
-        portfolio_items = await cursor.to_list(length=limit)
+        async def render():
+            db = get_database()
+            projection = build_projection(Portfolio, fields, PORTFOLIO_SUMMARY_EXCLUDE, ("id", "created_at"))
+            
+            # Build query
+            query = {}
+            if service_type:
+                query["service_type"] = service_type
+            if is_featured is not None:
+                query["is_featured"] = is_featured
+            
+            # Get portfolio items
+            page, total = await asyncio.gather(
+                fetch_page(db.portfolio, query, NEWEST_FIRST, limit, skip=skip, cursor=cursor, projection=projection),
+                counters_service.count("portfolio", query)
+            )
+            return page_response(page, total, limit)
         
-        return [Portfolio(**item) for item in portfolio_items]
+        return await cached_catalog_response("portfolio", validators, render)
         
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error getting portfolio items: {e}")
         raise HTTPException(status_code=500, detail="Failed to get portfolio items")
 
+@api_router.get("/portfolio/{portfolio_id}", response_model=Portfolio)
+async def get_portfolio_item(portfolio_id: str, request: Request):
+    """Get a full portfolio item, including images"""
+    try:
+        validators = catalog_versions.validators("portfolio", request)
+        if not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+        
+        db = get_database()
+        
+        item = await db.portfolio.find_one({"id": portfolio_id}, model_projection(Portfolio))
+        if item is None:
+            raise HTTPException(status_code=404, detail="Portfolio item not found")
+        
+        return FastJSONResponse(item, headers=validators)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting portfolio item: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get portfolio item")
+
 @api_router.put("/portfolio/{portfolio_id}", response_model=StandardResponse)
 async def update_portfolio_item(
     portfolio_id: str,
-    update_data: PortfolioUpdate
+    update_data: PortfolioUpdate,
+    background_tasks: BackgroundTasks
 ):
     """Update portfolio item"""
     try:
@@ -407,15 +657,33 @@ async def update_portfolio_item(
         
         # Update portfolio item
         update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
+        update_dict.update(await media_store.externalize_fields(update_dict, IMAGE_FIELDS["portfolio"]))
         update_dict["updated_at"] = datetime.utcnow()
         
-        result = await db.portfolio.update_one(
+        previous = await db.portfolio.find_one_and_update(
             {"id": portfolio_id},
-            {"$set": update_dict}
+            {"$set": update_dict},
+            projection={"_id": 0, "service_type": 1, "is_featured": 1, "title": 1, "technologies": 1},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             raise HTTPException(status_code=404, detail="Portfolio item not found")
+        updated = {**previous, **update_dict}
+        
+        # Move the item between filter counters if a filtered field changed
+        changes = filter_count_changes("portfolio", previous, updated)
+        if changes:
+            await counters_service.increment(changes)
+        
+        # Keep the autocomplete terms in step with the searchable fields
+        if set(update_dict) & set(SEARCH_TARGETS[SearchScope.PORTFOLIO].term_fields):
+            await db.portfolio.update_one(
+                {"id": portfolio_id},
+                {"$set": {"search_terms": search_terms(SearchScope.PORTFOLIO, updated)}}
+            )
+        await catalog_versions.bump("portfolio")
+        background_tasks.add_task(image_pipeline.process_all, media_digests(update_dict, IMAGE_FIELDS["portfolio"]))
         
         return StandardResponse(
             success=True,
@@ -424,6 +692,8 @@ async def update_portfolio_item(
         
     except HTTPException:
         raise
+    except MediaTypeNotAllowedError as e:
+        raise HTTPException(status_code=415, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating portfolio item: {e}")
         raise HTTPException(status_code=500, detail="Failed to update portfolio item")
@@ -431,25 +701,31 @@ async def update_portfolio_item(
 # Services Endpoints
 @api_router.get("/services", response_model=List[Service])
 async def get_services(
+    request: Request,
     category: Optional[ServiceType] = None,
     is_active: Optional[bool] = True
 ):
     """Get services"""
     try:
-        db = get_database()
-        
-        # Build query
-        query = {}
-        if category:
-            query["category"] = category
-        if is_active is not None:
-            query["is_active"] = is_active
+        validators = catalog_versions.validators("services", request)
+        if not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
         
-        # Get services
-        cursor = db.services.find(query).sort("created_at", -1)
-        services = await cursor.to_list(length=100)
+        async def render():
+            db = get_database()
+            
+            # Build query
+            query = {}
+            if category:
+                query["category"] = category
+            if is_active is not None:
+                query["is_active"] = is_active
+            
+            # Get services
+            cursor = db.services.find(query, model_projection(Service)).sort("created_at", -1)
+            return FastJSONResponse(await cursor.to_list(length=100))
         
-        return [Service(**service) for service in services]
+        return await cached_catalog_response("services", validators, render)
         
     except Exception as e:
         logger.error(f"Error getting services: {e}")
@@ -464,10 +740,11 @@ async def create_service(
         db = get_database()
         
         # Create service
-        service = Service(**service_data.dict())
+        service = Service.model_construct(**service_data.dict())
         
         # Save to database
         await db.services.insert_one(service.dict())
+        await catalog_versions.bump("services")
         
         return StandardResponse(
             success=True,
@@ -491,13 +768,14 @@ async def create_booking(
         db = get_database()
         
         # Create booking
-        booking = Booking(
+        booking = Booking.model_construct(
             user_id=user_id or str(uuid.uuid4()),
             **booking_data.dict()
         )
         
         # Save to database
-        await db.bookings.insert_one(booking.dict())
+        booking_doc = booking.dict()
+        await db.bookings.insert_one(booking_doc)
         
         # Send confirmation email in background
         if user_id:
@@ -510,11 +788,13 @@ async def create_booking(
                 )
         
         # Track analytics
-        await db.analytics.update_one(
-            {"analytics_date": date.today().isoformat()},
-            {"$inc": {"bookings": 1}},
-            upsert=True
-        )
+        analytics_aggregator.increment("bookings")
+        await counters_service.increment({
+            "bookings": 1,
+            **filter_count_amounts("bookings", booking_doc)
+        })
+        admin_cache.invalidate("bookings")
+        admin_cache.invalidate("analytics")
         
         return StandardResponse(
             success=True,
@@ -526,12 +806,13 @@ async def create_booking(
         logger.error(f"Error creating booking: {e}")
         raise HTTPException(status_code=500, detail="Failed to create booking")
 
-@api_router.get("/bookings", response_model=List[Booking])
+@api_router.get("/bookings", response_model=PaginatedResponse)
 async def get_bookings(
     user_id: Optional[str] = None,
     status: Optional[BookingStatus] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=100)
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
 ):
     """Get bookings"""
     try:
@@ -545,54 +826,110 @@ async def get_bookings(
             query["status"] = status
         
         # Get bookings
-        cursor = db.bookings.find(query).skip(skip).limit(limit).sort("created_at", -1)
-        bookings = await cursor.to_list(length=limit)
+        async def load():
+            return await asyncio.gather(
+                fetch_page(
+                    db.bookings, query, NEWEST_FIRST, limit, skip=skip, cursor=cursor,
+                    projection=model_projection(Booking)
+                ),
+                counters_service.count("bookings", query)
+            )
         
-        return [Booking(**booking) for booking in bookings]
+        page, total = await admin_cache.get_or_compute(
+            ("bookings", user_id, status, skip, limit, cursor), load
+        )
+        
+        return page_response(page, total, limit)
         
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error getting bookings: {e}")
         raise HTTPException(status_code=500, detail="Failed to get bookings")
 
 # Testimonials Endpoints
-@api_router.get("/testimonials", response_model=List[Testimonial])
+@api_router.get("/testimonials", response_model=PaginatedResponse)
 async def get_testimonials(
+    request: Request,
     is_featured: Optional[bool] = None,
     skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=50)
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all but image)")
 ):
-    """Get testimonials"""
+    """Get testimonials (summary view; full testimonials from /testimonials/{id})"""
     try:
-        db = get_database()
-        
-        # Build query
-        query = {}
-        if is_featured is not None:
-            query["is_featured"] = is_featured
+        validators = catalog_versions.validators("testimonials", request)
+        if not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
         
-        # Get testimonials
-        cursor = db.testimonials.find(query).skip(skip).limit(limit).sort("rating", -1)
-        testimonials = await cursor.to_list(length=limit)
+        async def render():
+            db = get_database()
+            projection = build_projection(Testimonial, fields, TESTIMONIAL_SUMMARY_EXCLUDE, ("id", "rating"))
+            
+            # Build query
+            query = {}
+            if is_featured is not None:
+                query["is_featured"] = is_featured
+            
+            # Get testimonials
+            page, total = await asyncio.gather(
+                fetch_page(db.testimonials, query, HIGHEST_RATED, limit, skip=skip, cursor=cursor, projection=projection),
+                counters_service.count("testimonials", query)
+            )
+            return page_response(page, total, limit)
         
-        return [Testimonial(**testimonial) for testimonial in testimonials]
+        return await cached_catalog_response("testimonials", validators, render)
         
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     except Exception as e:
         logger.error(f"Error getting testimonials: {e}")
         raise HTTPException(status_code=500, detail="Failed to get testimonials")
 
+@api_router.get("/testimonials/{testimonial_id}", response_model=Testimonial)
+async def get_testimonial(testimonial_id: str, request: Request):
+    """Get a full testimonial, including the image"""
+    try:
+        validators = catalog_versions.validators("testimonials", request)
+        if not_modified(request, validators):
+            return Response(status_code=304, headers=validators)
+        
+        db = get_database()
+        
+        testimonial = await db.testimonials.find_one({"id": testimonial_id}, model_projection(Testimonial))
+        if testimonial is None:
+            raise HTTPException(status_code=404, detail="Testimonial not found")
+        
+        return FastJSONResponse(testimonial, headers=validators)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting testimonial: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get testimonial")
+
 @api_router.post("/testimonials", response_model=StandardResponse)
 async def create_testimonial(
-    testimonial_data: TestimonialCreate
+    testimonial_data: TestimonialCreate,
+    background_tasks: BackgroundTasks
 ):
     """Create a new testimonial"""
     try:
         db = get_database()
         
         # Create testimonial
-        testimonial = Testimonial(**testimonial_data.dict())
+        testimonial = Testimonial.model_construct(**testimonial_data.dict())
         
         # Save to database
-        await db.testimonials.insert_one(testimonial.dict())
+        testimonial_doc = testimonial.dict()
+        testimonial_doc.update(await media_store.externalize_fields(testimonial_doc, IMAGE_FIELDS["testimonials"]))
+        await db.testimonials.insert_one(testimonial_doc)
+        await counters_service.increment(filter_count_amounts("testimonials", testimonial_doc))
+        await catalog_versions.bump("testimonials")
+        background_tasks.add_task(image_pipeline.process_all, media_digests(testimonial_doc, IMAGE_FIELDS["testimonials"]))
         
         return StandardResponse(
             success=True,
@@ -600,6 +937,8 @@ async def create_testimonial(
             data={"id": testimonial.id}
         )
         
+    except MediaTypeNotAllowedError as e:
+        raise HTTPException(status_code=415, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating testimonial: {e}")
         raise HTTPException(status_code=500, detail="Failed to create testimonial")
@@ -611,38 +950,40 @@ async def get_analytics_summary():
     try:
         db = get_database()
         
-        # Get today's analytics
-        today = date.today().isoformat()
-        today_analytics = await db.analytics.find_one({"analytics_date": today})
-        
-        # Get total counts
-        total_contacts = await db.contact_forms.count_documents({})
-        total_bookings = await db.bookings.count_documents({})
-        total_chat_sessions = await db.chat_sessions.count_documents({})
-        total_portfolio = await db.portfolio.count_documents({})
-        
-        # Get recent activity
-        recent_contacts = await db.contact_forms.count_documents({
-            "created_at": {"$gte": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)}
-        })
-        
-        summary = {
-            "today": {
-                "page_views": today_analytics.get("page_views", 0) if today_analytics else 0,
-                "contact_forms": today_analytics.get("contact_forms", 0) if today_analytics else 0,
-                "bookings": today_analytics.get("bookings", 0) if today_analytics else 0,
-                "chat_sessions": today_analytics.get("chat_sessions", 0) if today_analytics else 0,
-            },
-            "total": {
-                "contacts": total_contacts,
-                "bookings": total_bookings,
-                "chat_sessions": total_chat_sessions,
-                "portfolio_items": total_portfolio,
-            },
-            "recent": {
-                "contacts_today": recent_contacts,
+        async def load():
+            # Today's analytics (plus increments not flushed yet) and the
+            # materialized totals, read in parallel
+            today = date.today().isoformat()
+            today_analytics, totals = await asyncio.gather(
+                db.analytics.find_one({"analytics_date": today}, {"visitor_sketch": 0, "hourly": 0}),
+                counters_service.get()
+            )
+            today_counts = dict(today_analytics or {})
+            for counter, amount in analytics_aggregator.pending_for(today).items():
+                today_counts[counter] = today_counts.get(counter, 0) + amount
+            
+            return {
+                "today": {
+                    "page_views": today_counts.get("page_views", 0),
+                    "unique_visitors": today_counts.get("unique_visitors", 0),
+                    "contact_forms": today_counts.get("contact_forms", 0),
+                    "bookings": today_counts.get("bookings", 0),
+                    "chat_sessions": today_counts.get("chat_sessions", 0),
+                },
+                "total": {
+                    "contacts": totals.get("contacts", 0),
+                    "bookings": totals.get("bookings", 0),
+                    "chat_sessions": totals.get("chat_sessions", 0),
+                    "portfolio_items": totals.get("portfolio_items", 0),
+                },
+                "recent": {
+                    "contacts_today": today_counts.get("contact_forms", 0),
+                }
             }
-        }
+        
+        summary = await admin_cache.get_or_compute(
+            ("analytics", "summary"), load, ttl=settings.analytics_summary_cache_ttl
+        )
         
         return StandardResponse(
             success=True,
@@ -654,6 +995,287 @@ async def get_analytics_summary():
         logger.error(f"Error getting analytics summary: {e}")
         raise HTTPException(status_code=500, detail="Failed to get analytics summary")
 
+@api_router.get("/analytics/visitors")
+async def get_unique_visitors(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to")
+):
+    """Estimate unique visitors over a date range by merging daily sketches"""
+    try:
+        db = get_database()
+        
+        async def load():
+            cursor = db.analytics.find(
+                {"analytics_date": {"$gte": from_date.isoformat(), "$lte": to_date.isoformat()}},
+                {"_id": 0, "visitor_sketch": 1}
+            )
+            docs = await cursor.to_list(length=None)
+            return HyperLogLog.union(
+                HyperLogLog.from_bytes(doc["visitor_sketch"])
+                for doc in docs if doc.get("visitor_sketch")
+            )
+        
+        sketch = await admin_cache.get_or_compute(("analytics", "visitors", from_date, to_date), load)
+        
+        return StandardResponse(
+            success=True,
+            message="Unique visitors retrieved successfully",
+            data={
+                "from": from_date.isoformat(),
+                "to": to_date.isoformat(),
+                "unique_visitors": sketch.count(),
+                "standard_error": round(sketch.standard_error, 4)
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Error getting unique visitors: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get unique visitors")
+
+@api_router.get("/analytics/timeseries")
+async def get_analytics_timeseries(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    metric: AnalyticsMetric = AnalyticsMetric.PAGE_VIEWS,
+    granularity: TimeGranularity = TimeGranularity.DAILY,
+    window: int = Query(7, ge=1, le=365, description="Moving average window, in periods")
+):
+    """Get an analytics metric over a date range with rollups"""
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if granularity == TimeGranularity.HOURLY and (to_date - from_date).days >= MAX_HOURLY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Hourly ranges are limited to {MAX_HOURLY_DAYS} days")
+    
+    try:
+        db = get_database()
+        
+        # One bulk read of just the fields the metric needs
+        async def load():
+            field = f"hourly.{metric.value}" if granularity == TimeGranularity.HOURLY else metric.value
+            cursor = db.analytics.find(
+                {"analytics_date": {"$gte": from_date.isoformat(), "$lte": to_date.isoformat()}},
+                {"_id": 0, "analytics_date": 1, field: 1}
+            )
+            docs = await cursor.to_list(length=None)
+            return build_timeseries(docs, metric, granularity, from_date, to_date, window)
+        
+        timeseries = await admin_cache.get_or_compute(
+            ("analytics", "timeseries", from_date, to_date, metric, granularity, window), load
+        )
+        
+        return StandardResponse(
+            success=True,
+            message="Analytics time series retrieved successfully",
+            data=timeseries
+        )
+        
+    except Exception as e:
+        logger.error(f"Error getting analytics time series: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get analytics time series")
+
+@api_router.get("/analytics/funnel")
+async def get_funnel_analytics(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    service: Optional[ServiceType] = None
+):
+    """Get lead funnel conversion and time-in-stage statistics"""
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    
+    try:
+        report = await admin_cache.get_or_compute(
+            ("funnel", from_date, to_date, service),
+            lambda: funnel_service.report(from_date, to_date, service)
+        )
+        
+        return StandardResponse(
+            success=True,
+            message="Funnel analytics retrieved successfully",
+            data=report
+        )
+        
+    except Exception as e:
+        logger.error(f"Error getting funnel analytics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get funnel analytics")
+
+@api_router.post("/analytics/reconcile", response_model=StandardResponse)
+async def reconcile_analytics_counters():
+    """Recount the materialized totals from source (admin only)"""
+    try:
+        totals = await counters_service.reconcile()
+        admin_cache.invalidate("analytics")
+        
+        return StandardResponse(
+            success=True,
+            message="Counters reconciled successfully",
+            data=totals
+        )
+        
+    except Exception as e:
+        logger.error(f"Error reconciling counters: {e}")
+        raise HTTPException(status_code=500, detail="Failed to reconcile counters")
+
+# Media Endpoints
+def stream_media(grid_out, request: Request, headers: Dict[str, str]) -> Response:
+    """Stream a stored blob, or the byte range the request asks for"""
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    length = grid_out.length
+    content_type = (grid_out.metadata or {}).get("contentType", "application/octet-stream")
+    try:
+        byte_range = parse_range(request.headers.get("range"), length)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{length}"})
+    
+    if byte_range is None:
+        start, end, status_code = 0, length - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    return StreamingResponse(
+        iter_range(grid_out, start, end),
+        status_code=status_code,
+        media_type=content_type,
+        headers=headers
+    )
+
+@api_router.get("/media/{digest}")
+async def get_media(digest: str, request: Request):
+    """Stream a stored image or file by its SHA-256, honouring Range requests"""
+    # Content-addressed, so the hash is a strong validator that never changes
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        grid_out = await media_store.open(digest)
+    except MediaNotFoundError:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return stream_media(grid_out, request, headers)
+
+@api_router.get("/media/{digest}/{variant}")
+async def get_media_variant(digest: str, variant: str, request: Request):
+    """Stream a resized variant of a stored image (thumb, medium or full),
+    as WebP when the client accepts it"""
+    if variant not in VARIANT_SIZES:
+        raise HTTPException(status_code=404, detail="Unknown image variant")
+    
+    variants = await image_pipeline.get_variants(digest)
+    if variants is None:
+        # Not rendered yet (or not an image): serve the original briefly so
+        # the client asks again once the variant exists
+        target = digest
+        headers = {"ETag": f'"{digest}"', "Cache-Control": "public, max-age=60"}
+    else:
+        _, target = choose_format(variants[variant], request.headers.get("accept", ""))
+        headers = {"ETag": f'"{target}"', "Cache-Control": "public, max-age=31536000, immutable"}
+    headers["Vary"] = "Accept"
+    if not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        grid_out = await media_store.open(target)
+    except MediaNotFoundError:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return stream_media(grid_out, request, headers)
+
+@api_router.post("/uploads", response_model=StandardResponse)
+async def upload_files(request: Request, background_tasks: BackgroundTasks):
+    """Upload images or PDFs as multipart/form-data into the media store.
+    
+    The body is streamed, never buffered: each file is hashed and written to
+    GridFS as it arrives, and a file over ``max_file_size`` or of a type not
+    in ``allowed_file_types`` is rejected as soon as that is known. Returns
+    the media URL to reference from portfolio items and testimonials.
+    """
+    try:
+        stored = await store_uploads(request)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error storing upload: {e}")
+        raise HTTPException(status_code=500, detail="Failed to store upload")
+    
+    images = [upload.sha256 for upload in stored if upload.content_type.startswith("image/")]
+    background_tasks.add_task(image_pipeline.process_all, images)
+    
+    return StandardResponse(
+        success=True,
+        message=f"Stored {len(stored)} file(s)",
+        data={"files": [
+            {
+                "url": media_url(upload.sha256),
+                "sha256": upload.sha256,
+                "filename": upload.filename,
+                "content_type": upload.content_type,
+                "size": upload.size,
+                "created": upload.created,
+            }
+            for upload in stored
+        ]}
+    )
+
+# Search Endpoints
+@api_router.get("/search", response_model=PaginatedResponse)
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=200),
+    scope: Optional[SearchScope] = Query(None, description="Search one collection (default: all)"),
+    mode: SearchMode = Query(SearchMode.FULL, description="full: ranked full-text; prefix: autocomplete"),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    """Search contact forms and portfolio items (admin only)"""
+    try:
+        scopes = [scope] if scope else list(SearchScope)
+        page = await search(get_database(), q, mode, scopes, limit, cursor)
+        
+        # Counting every text match would cost as much as the search itself
+        return page_response(page, None, limit)
+        
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except SearchTooBroadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching: {e}")
+        raise HTTPException(status_code=500, detail="Failed to search")
+
+# Export Endpoints
+@api_router.get("/export/{collection}")
+async def export_data(
+    collection: ExportCollection,
+    format: ExportFormat = ExportFormat.NDJSON,
+    status: Optional[str] = Query(None, description="Contacts or bookings status"),
+    user_id: Optional[str] = Query(None, description="Bookings or chats user"),
+    session_id: Optional[str] = Query(None, description="Chats session")
+):
+    """Stream a whole collection as NDJSON or CSV (admin only)"""
+    # Same filters as the matching list endpoints
+    query = {}
+    try:
+        if status and collection == ExportCollection.CONTACTS:
+            query["status"] = ContactStatus(status)
+        elif status and collection == ExportCollection.BOOKINGS:
+            query["status"] = BookingStatus(status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid status for {collection.value}")
+    if user_id and collection in (ExportCollection.BOOKINGS, ExportCollection.CHATS):
+        query["user_id"] = user_id
+    if session_id and collection == ExportCollection.CHATS:
+        query["session_id"] = session_id
+    
+    filename = f"{collection.value}_export_{date.today().isoformat()}.{format.value}"
+    return StreamingResponse(
+        stream_export(get_database(), collection, query, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # Include the API router
 app.include_router(api_router)
 
@@ -661,14 +1283,27 @@ app.include_router(api_router)
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connection on startup"""
+    # No-op on first start; restarts logging after a previous shutdown
+    setup_logging()
     await connect_to_db()
+    await analytics_aggregator.start()
+    await counters_service.start()
+    await catalog_versions.load()
+    await catalog_change_listener.start()
+    await ai_service.pool.start()
     logger.info("NOWHERE Digital API started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection on shutdown"""
+    await catalog_change_listener.stop()
+    await ai_service.pool.stop()
+    image_pipeline.shutdown()
+    await counters_service.stop()
+    await analytics_aggregator.stop()
     await close_db_connection()
     logger.info("NOWHERE Digital API shutdown")
+    stop_logging()
 
 # Root endpoint
 @app.get("/")
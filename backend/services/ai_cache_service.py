@@ -0,0 +1,115 @@
+from config import settings
+from database import get_database
+from services.cache_service import TTLCache
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompts differing only in case or whitespace get the same answer"""
+    return " ".join(prompt.split()).casefold()
+
+def cache_key(prompt: str, system_message: str, model: str, content_type: Optional[str]) -> str:
+    payload = json.dumps([normalize_prompt(prompt), system_message, model, content_type])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class AIResponseCache:
+    """Two-tier cache of one-shot LLM responses.
+
+    A process-local LRU (a ``TTLCache``, so identical concurrent prompts
+    share one generation) sits in front of the ``ai_response_cache``
+    collection, which every worker shares and whose TTL index on
+    ``expires_at`` deletes expired answers. Entries are keyed by a hash of
+    the normalized prompt, system message, model and content type; neither
+    the prompt nor the system message is stored. Lifetimes are per endpoint
+    (``ai_cache_ttls``), and the local copy never outlives
+    ``ai_cache_memory_ttl``.
+    """
+
+    def __init__(self, memory: TTLCache):
+        self.memory = memory
+        self.shared_hits = 0
+
+    async def get_or_generate(
+        self,
+        endpoint: str,
+        prompt: str,
+        system_message: str,
+        content_type: Optional[str],
+        generate: Callable[[], Awaitable[str]],
+        bypass: bool = False
+    ) -> str:
+        """Cached response for a prompt, generating it on a miss.
+
+        With ``bypass`` the response is always generated afresh and replaces
+        the cached one. Failures raise and are never cached.
+        """
+        model = f"{settings.ai_provider}/{settings.default_ai_model}"
+        key = cache_key(prompt, system_message, model, content_type)
+        ttl = settings.ai_cache_ttls.get(endpoint, settings.ai_cache_ttls["default"])
+        memory_ttl = min(ttl, settings.ai_cache_memory_ttl)
+
+        async def load() -> str:
+            cached = await self._read(key)
+            if cached is not None:
+                self.shared_hits += 1
+                return cached
+            response = await generate()
+            await self._write(key, endpoint, model, content_type, response, ttl)
+            return response
+
+        if bypass:
+            response = await generate()
+            self.memory.set((endpoint, key), response, memory_ttl)
+            await self._write(key, endpoint, model, content_type, response, ttl)
+            return response
+        return await self.memory.get_or_compute((endpoint, key), load, memory_ttl)
+
+    async def _read(self, key: str) -> Optional[str]:
+        try:
+            # The TTL monitor runs once a minute, so check expiry ourselves
+            doc = await get_database().ai_response_cache.find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.utcnow()}}, {"response": 1}
+            )
+        except Exception as e:
+            logger.error(f"Error reading AI response cache: {e}")
+            return None
+        return doc["response"] if doc else None
+
+    async def _write(self, key: str, endpoint: str, model: str, content_type: Optional[str], response: str, ttl: int):
+        now = datetime.utcnow()
+        try:
+            await get_database().ai_response_cache.replace_one(
+                {"_id": key},
+                {
+                    "endpoint": endpoint,
+                    "model": model,
+                    "content_type": content_type,
+                    "response": response,
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=ttl),
+                },
+                upsert=True
+            )
+        except Exception as e:
+            # The response is still good; it just is not shared
+            logger.error(f"Error writing AI response cache: {e}")
+
+    def render_metrics(self) -> List[str]:
+        """Prometheus lines for hits served by the shared (MongoDB) tier"""
+        return [
+            "# HELP ai_response_cache_shared_hits_total Responses found in MongoDB after a local miss.",
+            "# TYPE ai_response_cache_shared_hits_total counter",
+            f"ai_response_cache_shared_hits_total {self.shared_hits}",
+        ]
+
+# Create global AI response cache instance
+ai_response_cache = AIResponseCache(TTLCache(
+    "ai_responses",
+    max_entries=settings.ai_cache_max_entries,
+    default_ttl=settings.ai_cache_memory_ttl
+))
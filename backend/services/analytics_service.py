@@ -0,0 +1,180 @@
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from database import get_database
+from services.hyperloglog import HyperLogLog
+from collections import defaultdict
+from datetime import date, datetime
+import logging
+from typing import Dict, Optional
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+class AnalyticsAggregator:
+    """Write-behind aggregator for the daily analytics counters.
+
+    Increments are buffered in memory and flushed as a single ``$inc`` per
+    day document, either every ``flush_interval`` seconds or as soon as
+    ``flush_threshold`` increments are pending.
+
+    Unique visitors are tracked the same way in a per-day HyperLogLog
+    sketch that is merged into the register array stored on the day's
+    document, so sketches from every worker combine into one.
+    """
+
+    # Attempts at the optimistic read-merge-write of a day's sketch
+    SKETCH_MERGE_ATTEMPTS = 5
+
+    def __init__(self, flush_interval: float, flush_threshold: int):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._pending_count = 0
+        self._sketches: Dict[str, HyperLogLog] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def increment(self, counter: str, amount: int = 1):
+        """Queue an increment of a counter on today's analytics document"""
+        now = datetime.now()
+        pending = self._pending[now.date().isoformat()]
+        pending[counter] += amount
+        # Per-hour breakdown used by the hourly time series
+        pending[f"hourly.{counter}.{now.hour:02d}"] += amount
+        self._pending_count += 1
+
+        if self._wakeup and self._pending_count >= self.flush_threshold:
+            self._wakeup.set()
+
+    def add_visitor(self, fingerprint: bytes):
+        """Add a hashed client fingerprint to today's unique visitor sketch"""
+        today = date.today().isoformat()
+        sketch = self._sketches.get(today)
+        if sketch is None:
+            sketch = self._sketches[today] = HyperLogLog()
+        sketch.add(fingerprint)
+
+    def pending_for(self, day: str) -> Dict[str, int]:
+        """Increments for a day that have not been flushed yet"""
+        return dict(self._pending.get(day, {}))
+
+    async def start(self):
+        """Start the background flush loop"""
+        if self._task:
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info("Analytics aggregator started")
+
+    async def stop(self):
+        """Stop the flush loop and write out whatever is still pending"""
+        if self._task:
+            # Not cancelled: a flush in progress has swapped its buffers out
+            # and must finish (or re-queue them) before the final flush
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._wakeup = None
+
+        await self.flush()
+        logger.info("Analytics aggregator stopped")
+
+    async def flush(self):
+        """Write all pending increments and visitor sketches to MongoDB"""
+        await self._flush_counters()
+        await self._flush_sketches()
+
+    async def _flush_counters(self):
+        if not self._pending:
+            return
+
+        # Swap the buffer out so increments arriving during the write
+        # land in a fresh one
+        pending, self._pending = self._pending, defaultdict(lambda: defaultdict(int))
+        self._pending_count = 0
+
+        operations = [
+            UpdateOne({"analytics_date": day}, {"$inc": dict(counters)}, upsert=True)
+            for day, counters in pending.items()
+        ]
+
+        try:
+            db = get_database()
+            await db.analytics.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error flushing analytics counters: {e}")
+            # Put the increments back so the next flush retries them
+            for day, counters in pending.items():
+                for counter, amount in counters.items():
+                    self._pending[day][counter] += amount
+                    self._pending_count += 1
+
+    async def _flush_sketches(self):
+        sketches, self._sketches = self._sketches, {}
+
+        for day, sketch in sketches.items():
+            try:
+                await self._merge_sketch(day, sketch)
+            except Exception as e:
+                logger.error(f"Error flushing visitor sketch for {day}: {e}")
+                # Keep the registers for the next flush
+                self._sketches.setdefault(day, HyperLogLog()).merge(sketch)
+
+    async def _merge_sketch(self, day: str, sketch: HyperLogLog):
+        """Merge a sketch into the stored one with optimistic concurrency"""
+        db = get_database()
+
+        for _ in range(self.SKETCH_MERGE_ATTEMPTS):
+            stored = await db.analytics.find_one(
+                {"analytics_date": day},
+                {"visitor_sketch": 1, "sketch_version": 1}
+            ) or {}
+            version = stored.get("sketch_version")
+
+            merged = HyperLogLog()
+            if stored.get("visitor_sketch"):
+                merged = HyperLogLog.from_bytes(stored["visitor_sketch"])
+            merged.merge(sketch)
+
+            try:
+                # Only applies if no other worker merged since we read;
+                # otherwise the upsert collides on the unique date index
+                result = await db.analytics.update_one(
+                    {"analytics_date": day, "sketch_version": version},
+                    {
+                        "$set": {
+                            "visitor_sketch": merged.to_bytes(),
+                            "unique_visitors": merged.count(),
+                            "sketch_version": (version or 0) + 1
+                        }
+                    },
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                continue
+
+            if result.matched_count or result.upserted_id is not None:
+                return
+
+        raise RuntimeError("sketch was concurrently modified too many times")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            await self.flush()
+
+# Create global analytics aggregator instance
+analytics_aggregator = AnalyticsAggregator(
+    flush_interval=settings.analytics_flush_interval,
+    flush_threshold=settings.analytics_flush_threshold
+)
@@ -0,0 +1,134 @@
+from config import settings
+from collections import OrderedDict
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+
+class TTLCache:
+    """Size-bounded LRU cache with per-entry TTL and request coalescing.
+
+    Concurrent misses for the same key share one in-flight computation, so a
+    burst of identical requests costs a single database round-trip. Keys are
+    tuples whose first element is a namespace, which is the unit of
+    invalidation.
+    """
+
+    instances: List["TTLCache"] = []
+
+    def __init__(self, name: str, max_entries: int, default_ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        TTLCache.instances.append(self)
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """Return ``(found, value)`` for a live entry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: Tuple, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries if full"""
+        self._entries[key] = (time.monotonic() + (ttl or self.default_ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, namespace: Optional[Hashable] = None):
+        """Drop every entry in a namespace, or the whole cache"""
+        # Loads already in flight must not repopulate with stale data, nor
+        # be shared with callers arriving after the invalidation
+        if namespace is None:
+            self._entries.clear()
+            self._inflight.clear()
+            self._epoch += 1
+            return
+        for key in [key for key in self._entries if key[0] == namespace]:
+            del self._entries[key]
+        for key in [key for key in self._inflight if key[0] == namespace]:
+            del self._inflight[key]
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    async def get_or_compute(self, key: Tuple, compute: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """Return a cached value, computing it at most once per key at a time"""
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            future = asyncio.ensure_future(self._load(key, compute, ttl))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finished(key, done))
+
+        # Shielded so one caller going away does not cancel the shared load
+        return await asyncio.shield(future)
+
+    async def _load(self, key: Tuple, compute: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        generation = self._generation(key[0])
+        value = await compute()
+        if self._generation(key[0]) == generation:
+            self.set(key, value, ttl)
+        return value
+
+    def _finished(self, key: Tuple, future: asyncio.Future):
+        # An invalidation may already have replaced this load with a newer one
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def _generation(self, namespace: Hashable) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(namespace, 0)
+
+def render_cache_metrics() -> List[str]:
+    """Prometheus lines for every cache instance"""
+    lines = [
+        "# HELP cache_requests_total Cache lookups by result.",
+        "# TYPE cache_requests_total counter",
+    ]
+    for cache in TTLCache.instances:
+        for result, value in (("hit", cache.hits), ("miss", cache.misses), ("coalesced", cache.coalesced)):
+            lines.append(f'cache_requests_total{{cache="{cache.name}",result="{result}"}} {value}')
+    lines += [
+        "# HELP cache_evictions_total Entries evicted to stay within the size bound.",
+        "# TYPE cache_evictions_total counter",
+    ]
+    lines += [f'cache_evictions_total{{cache="{cache.name}"}} {cache.evictions}' for cache in TTLCache.instances]
+    lines += [
+        "# HELP cache_entries Entries currently held.",
+        "# TYPE cache_entries gauge",
+    ]
+    lines += [f'cache_entries{{cache="{cache.name}"}} {len(cache._entries)}' for cache in TTLCache.instances]
+    return lines
+
+# Create global cache for read-heavy admin endpoints
+admin_cache = TTLCache(
+    "admin",
+    max_entries=settings.admin_cache_max_entries,
+    default_ttl=settings.admin_cache_ttl
+)
+
+# Create global cache of rendered public catalog responses
+catalog_cache = TTLCache(
+    "catalog",
+    max_entries=settings.catalog_cache_max_entries,
+    default_ttl=settings.catalog_cache_ttl
+)
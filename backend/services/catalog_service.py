@@ -0,0 +1,182 @@
+from config import settings
+from database import get_database
+from services.cache_service import catalog_cache
+from services.invalidation_bus import invalidation_bus, InvalidationEvent
+from bson import Timestamp
+from pymongo import ReturnDocument
+from starlette.requests import Request
+from starlette.responses import Response
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Collections behind the public catalog endpoints
+CATALOG_COLLECTIONS = ("services", "portfolio", "testimonials")
+
+class CatalogVersions:
+    """Per-collection version counters for the public catalog.
+
+    Every write to a catalog collection bumps its counter in the
+    ``catalog_versions`` collection and in memory. Conditional GETs are
+    answered from the in-memory copy, so a 304 never touches MongoDB, and
+    the version doubles as the generation of the collection's entries in
+    ``catalog_cache``. Bumps go through the invalidation bus, which also
+    carries other workers' bumps from the change stream listener.
+    """
+
+    def __init__(self):
+        self._versions: Dict[str, Tuple[int, datetime]] = {}
+
+    def _set(self, collection: str, version: int, updated_at: datetime):
+        # Never move backwards if a newer version was already seen
+        current = self._versions.get(collection)
+        if current is None or version >= current[0]:
+            self._versions[collection] = (version, updated_at.replace(microsecond=0, tzinfo=timezone.utc))
+        if current is not None and version > current[0]:
+            catalog_cache.invalidate(collection)
+
+    async def load(self):
+        """Read the persisted versions, creating missing counters"""
+        db = get_database()
+        now = datetime.utcnow()
+        for collection in CATALOG_COLLECTIONS:
+            doc = await db.catalog_versions.find_one_and_update(
+                {"_id": collection},
+                {"$setOnInsert": {"version": 0, "updated_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            self._set(collection, doc["version"], doc["updated_at"])
+
+    async def refresh(self):
+        """Re-read every persisted version, picking up other workers' bumps"""
+        db = get_database()
+        async for doc in db.catalog_versions.find({"_id": {"$in": list(CATALOG_COLLECTIONS)}}):
+            self._set(doc["_id"], doc["version"], doc["updated_at"])
+
+    def apply(self, event: InvalidationEvent):
+        """Invalidation bus handler"""
+        if event.version is None:
+            # A document changed outside the versioned write path
+            catalog_cache.invalidate(event.collection)
+        else:
+            self._set(event.collection, event.version, event.updated_at or datetime.utcnow())
+
+    async def bump(self, collection: str):
+        """Record a write to a catalog collection"""
+        try:
+            db = get_database()
+            doc = await db.catalog_versions.find_one_and_update(
+                {"_id": collection},
+                {
+                    "$inc": {"version": 1},
+                    "$set": {"updated_at": datetime.utcnow()},
+                    # Marks the writes before this bump as covered by it
+                    "$currentDate": {"covered_until": {"$type": "timestamp"}},
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            invalidation_bus.publish(InvalidationEvent(collection, doc["version"], doc["updated_at"]))
+        except Exception as e:
+            logger.error(f"Error bumping {collection} version: {e}")
+
+    async def record_change(self, collection: str, cluster_time: Timestamp):
+        """Bump a collection's version for a document change seen on the
+        change stream, unless a later bump already covers it.
+
+        API writes bump the version themselves, and every worker sees every
+        change; the conditional update makes exactly one bump happen per
+        change made outside the API (a shell edit, a migration). An API
+        write's own bump usually lands first and covers it; when the
+        listener wins the race the version just moves twice.
+        """
+        try:
+            db = get_database()
+            doc = await db.catalog_versions.find_one_and_update(
+                {"_id": collection, "$or": [
+                    {"covered_until": {"$lt": cluster_time}},
+                    {"covered_until": {"$exists": False}},
+                ]},
+                {
+                    "$inc": {"version": 1},
+                    "$set": {"updated_at": datetime.utcnow(), "covered_until": cluster_time},
+                },
+                return_document=ReturnDocument.AFTER
+            )
+            if doc is not None:
+                invalidation_bus.publish(InvalidationEvent(collection, doc["version"], doc["updated_at"]))
+        except Exception as e:
+            logger.error(f"Error bumping {collection} version for a direct change: {e}")
+
+    def get(self, collection: str) -> Tuple[int, datetime]:
+        """Current version and last-modified time of a collection"""
+        if collection not in self._versions:
+            self._set(collection, 0, datetime.utcnow())
+        return self._versions[collection]
+
+    def validators(self, collection: str, request: Request) -> Dict[str, str]:
+        """ETag, Last-Modified and Cache-Control headers for a catalog response.
+
+        The strong ETag covers the collection version and the full query
+        string, since each filter, page and projection is its own
+        representation.
+        """
+        version, updated_at = self.get(collection)
+        variant = f"{request.url.path}?{request.url.query}"
+        digest = hashlib.sha1(variant.encode()).hexdigest()[:16]
+        return {
+            "ETag": f'"{collection}-{version}-{digest}"',
+            "Last-Modified": format_datetime(updated_at, usegmt=True),
+            "Cache-Control": (
+                f"public, max-age={settings.catalog_cache_max_age}, "
+                f"stale-while-revalidate={settings.catalog_stale_while_revalidate}"
+            ),
+        }
+
+def not_modified(request: Request, validators: Dict[str, str]) -> bool:
+    """Whether the client's cached copy is current (RFC 9110 13.2.2:
+    If-None-Match wins over If-Modified-Since when both are sent)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = validators["ETag"]
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in validators:
+        try:
+            since: Optional[datetime] = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return parsedate_to_datetime(validators["Last-Modified"]) <= since
+    return False
+
+# Create global catalog versions instance
+catalog_versions = CatalogVersions()
+invalidation_bus.subscribe(catalog_versions.apply)
+
+async def cached_catalog_response(
+    collection: str,
+    validators: Dict[str, str],
+    render: Callable[[], Awaitable[Response]]
+) -> Response:
+    """Serve a catalog response from memory, rendering it once per version.
+
+    The ETag identifies the collection version and the query, so it is the
+    cache key: the body bytes (and pagination header) are stored as rendered
+    and a new version simply misses.
+    """
+    async def load() -> Tuple[bytes, Dict[str, str]]:
+        response = await render()
+        cursor = response.headers.get("x-next-cursor")
+        return response.body, {"X-Next-Cursor": cursor} if cursor else {}
+
+    body, headers = await catalog_cache.get_or_compute((collection, validators["ETag"]), load)
+    return Response(body, media_type="application/json", headers={**validators, **headers})
@@ -0,0 +1,155 @@
+from config import settings
+from database import get_database
+from services.catalog_service import catalog_versions, CATALOG_COLLECTIONS
+from services.cache_service import catalog_cache
+from services.invalidation_bus import invalidation_bus, InvalidationEvent
+from pymongo.errors import OperationFailure, PyMongoError
+from datetime import datetime
+import logging
+import time
+from typing import Any, Dict, Optional
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+# Server error codes meaning the stored resume token can no longer be used
+RESUME_TOKEN_LOST_CODES = {
+    260,  # InvalidResumeToken
+    280,  # ChangeStreamFatalError
+    286,  # ChangeStreamHistoryLost
+}
+
+MAX_RETRY_DELAY = 30  # seconds
+# Every worker follows the same stream, so the shared resume token is saved
+# at most this often per worker rather than once per event
+TOKEN_SAVE_INTERVAL = 5  # seconds
+
+class CatalogChangeListener:
+    """Publishes catalog changes made by any worker to this worker's caches.
+
+    On a replica set (or sharded cluster) it follows a change stream over the
+    catalog collections and ``catalog_versions``, storing the resume token in
+    ``change_stream_tokens`` so a restart picks up where it left off
+    (replaying at most ``TOKEN_SAVE_INTERVAL`` seconds of events, which the
+    handlers tolerate). Document changes that did not come through the API
+    bump the collection's version here, so ETags change with them. A
+    standalone server has no change streams; there the versions are re-read
+    every ``catalog_cache_ttl`` seconds, so other workers' writes show up
+    within one cache TTL.
+    """
+
+    TOKEN_ID = "catalog"
+
+    def __init__(self, fallback_interval: float):
+        self.fallback_interval = fallback_interval
+        self.mode: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start following changes, or polling on a standalone server"""
+        if self._task:
+            return
+        self.mode = "change_stream" if settings.change_streams_enabled and await self._supports_change_streams() else "ttl"
+        logger.info(f"Catalog invalidation mode: {self.mode}")
+        self._task = asyncio.create_task(self._watch() if self.mode == "change_stream" else self._poll())
+
+    async def stop(self):
+        """Stop the listener"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _supports_change_streams(self) -> bool:
+        try:
+            hello = await get_database().client.admin.command("hello")
+        except Exception as e:
+            logger.error(f"Error detecting MongoDB topology: {e}")
+            return False
+        return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+    async def _load_token(self) -> Optional[Dict[str, Any]]:
+        doc = await get_database().change_stream_tokens.find_one({"_id": self.TOKEN_ID})
+        return doc["token"] if doc else None
+
+    async def _save_token(self, token: Dict[str, Any]):
+        try:
+            await get_database().change_stream_tokens.update_one(
+                {"_id": self.TOKEN_ID},
+                {"$set": {"token": token, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except PyMongoError as e:
+            # Losing a token only means replaying a few idempotent events
+            logger.error(f"Error saving change stream resume token: {e}")
+
+    async def _watch(self):
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": [*CATALOG_COLLECTIONS, "catalog_versions"]},
+            "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+        }}]
+        try:
+            token = await self._load_token()
+        except PyMongoError as e:
+            logger.error(f"Error loading change stream resume token: {e}")
+            token = None
+        delay = 1
+        saved_token, saved_at = token, time.monotonic()
+        try:
+            while True:
+                try:
+                    async with get_database().watch(pipeline, resume_after=token) as stream:
+                        delay = 1
+                        async for change in stream:
+                            await self.handle(change)
+                            token = change["_id"]
+                            if time.monotonic() - saved_at >= TOKEN_SAVE_INTERVAL:
+                                await self._save_token(token)
+                                saved_token, saved_at = token, time.monotonic()
+                except PyMongoError as e:
+                    if isinstance(e, OperationFailure) and e.code in RESUME_TOKEN_LOST_CODES:
+                        # Events since the token are gone: start fresh and treat
+                        # everything as changed
+                        logger.warning(f"Change stream resume token unusable ({e.code}), restarting from now")
+                        token = None
+                        catalog_cache.invalidate()
+                        try:
+                            await get_database().change_stream_tokens.delete_one({"_id": self.TOKEN_ID})
+                            await catalog_versions.refresh()
+                            continue
+                        except PyMongoError as reset_error:
+                            logger.error(f"Error resetting change stream state: {reset_error}")
+                    logger.error(f"Change stream interrupted, retrying in {delay}s: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, MAX_RETRY_DELAY)
+        finally:
+            if token is not None and token != saved_token:
+                await self._save_token(token)
+
+    async def handle(self, change: Dict[str, Any]):
+        """Turn one change event into an invalidation event"""
+        collection = change["ns"]["coll"]
+        if collection != "catalog_versions":
+            invalidation_bus.publish(InvalidationEvent(collection))
+            await catalog_versions.record_change(collection, change["clusterTime"])
+            return
+
+        fields = change.get("fullDocument") or change.get("updateDescription", {}).get("updatedFields", {})
+        if "version" in fields:
+            invalidation_bus.publish(InvalidationEvent(
+                change["documentKey"]["_id"], fields["version"], fields.get("updated_at")
+            ))
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.fallback_interval)
+            try:
+                await catalog_versions.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing catalog versions: {e}")
+
+# Create global catalog change listener instance
+catalog_change_listener = CatalogChangeListener(fallback_interval=settings.catalog_cache_ttl)
@@ -0,0 +1,230 @@
+from emergentintegrations.llm.chat import LlmChat, UserMessage
+from collections import OrderedDict
+from contextlib import aclosing
+from dataclasses import dataclass, field
+import hashlib
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+
+# System messages with idle shared clients kept, least recently used dropped
+MAX_SHARED_PROMPTS = 64
+
+ClientFactory = Callable[[str, str], Awaitable[LlmChat]]
+
+@dataclass
+class PooledChat:
+    """A live client and what the pool knows about it"""
+    client: LlmChat
+    size: int  # estimated bytes of prompt and history held
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+class ChatClientPool:
+    """Configured ``LlmChat`` clients, reused instead of rebuilt per message.
+
+    Chat sessions each keep one client (and so their conversation) in an LRU
+    keyed by ``session_id``, bounded by ``max_sessions`` and by an estimate
+    of the text held, ``max_bytes``; sessions idle for ``idle_ttl`` seconds
+    are dropped by a background sweep. Messages within a session are sent
+    one at a time, in order.
+
+    One-shot calls share idle clients per system message. A one-shot must
+    not see earlier callers' prompts, so a client is only returned to the
+    pool if its ``messages`` list can be rewound to the state it was built
+    in; otherwise every call simply gets a new client.
+    """
+
+    def __init__(self, factory: ClientFactory, max_sessions: int, max_bytes: int, idle_ttl: float, max_idle_shared: int):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.max_idle_shared = max_idle_shared
+        self._sessions: "OrderedDict[str, PooledChat]" = OrderedDict()
+        self._shared: "OrderedDict[str, List[LlmChat]]" = OrderedDict()
+        self._initial_messages: Dict[int, list] = {}
+        self._bytes = 0
+        self._task: Optional[asyncio.Task] = None
+        self.hits = {"session": 0, "shared": 0}
+        self.misses = {"session": 0, "shared": 0}
+        self.evictions = {"lru": 0, "memory": 0, "idle": 0, "error": 0}
+
+    async def start(self):
+        """Start sweeping idle sessions"""
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        """Stop the sweeper and drop every client"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._sessions.clear()
+        self._shared.clear()
+        self._initial_messages.clear()
+        self._bytes = 0
+
+    async def _checkout(self, session_id: str, system_message: str) -> PooledChat:
+        entry = self._live(session_id)
+        if entry is not None:
+            self.hits["session"] += 1
+            self._sessions.move_to_end(session_id)
+            return entry
+        self.misses["session"] += 1
+        client = await self.factory(session_id, system_message)
+        # A concurrent first message may have created the session meanwhile
+        entry = self._live(session_id)
+        if entry is None:
+            entry = PooledChat(client, len(system_message))
+            self._sessions[session_id] = entry
+            self._bytes += entry.size
+        return entry
+
+    def _record(self, session_id: str, entry: PooledChat, text: str, response: str):
+        entry.last_used = time.monotonic()
+        if self._sessions.get(session_id) is entry:
+            growth = len(text) + len(response)
+            entry.size += growth
+            self._bytes += growth
+
+    async def send(self, session_id: str, system_message: str, text: str) -> str:
+        """Send a message in a session, continuing its conversation"""
+        entry = await self._checkout(session_id, system_message)
+        async with entry.lock:
+            try:
+                response = await entry.client.send_message(UserMessage(text=text))
+            except Exception:
+                # The conversation state is unknown after a failure
+                if self._sessions.get(session_id) is entry:
+                    self._remove(session_id, "error")
+                raise
+            self._record(session_id, entry, text, response)
+        self._evict()
+        return response
+
+    async def stream(self, session_id: str, system_message: str, text: str) -> AsyncIterator[str]:
+        """Send a message in a session, yielding the reply as it is generated.
+
+        Clients with a ``stream_message`` async iterator are relayed chunk
+        by chunk; others produce the whole completion as one chunk. Closing
+        the iterator early (the caller went away) cancels the upstream
+        request and, since the conversation is left half-written, drops
+        the session's client.
+        """
+        entry = await self._checkout(session_id, system_message)
+        async with entry.lock:
+            chunks = []
+            try:
+                stream_message = getattr(entry.client, "stream_message", None)
+                if stream_message is not None:
+                    async with aclosing(stream_message(UserMessage(text=text))) as upstream:
+                        async for chunk in upstream:
+                            chunks.append(chunk)
+                            yield chunk
+                else:
+                    chunks.append(await entry.client.send_message(UserMessage(text=text)))
+                    yield chunks[0]
+            except BaseException:
+                if self._sessions.get(session_id) is entry:
+                    self._remove(session_id, "error")
+                raise
+            self._record(session_id, entry, text, "".join(chunks))
+        self._evict()
+
+    async def send_once(self, system_message: str, text: str) -> str:
+        """Send a standalone prompt on a shared client for its system message"""
+        key = hashlib.sha1(system_message.encode()).hexdigest()
+        idle = self._shared.get(key)
+        if idle is None:
+            idle = self._shared[key] = []
+            while len(self._shared) > MAX_SHARED_PROMPTS:
+                for client in self._shared.pop(next(iter(self._shared))):
+                    self._initial_messages.pop(id(client), None)
+        self._shared.move_to_end(key)
+        if idle:
+            self.hits["shared"] += 1
+            client = idle.pop()
+        else:
+            self.misses["shared"] += 1
+            client = await self.factory(f"shared_{key[:16]}", system_message)
+            messages = getattr(client, "messages", None)
+            if isinstance(messages, list):
+                self._initial_messages[id(client)] = list(messages)
+
+        reusable = False
+        try:
+            response = await client.send_message(UserMessage(text=text))
+            reusable = self._rewind(client)
+            return response
+        finally:
+            if reusable and len(idle) < self.max_idle_shared:
+                idle.append(client)
+            else:
+                self._initial_messages.pop(id(client), None)
+
+    def _live(self, session_id: str) -> Optional[PooledChat]:
+        entry = self._sessions.get(session_id)
+        if entry is not None and time.monotonic() - entry.last_used > self.idle_ttl and not entry.lock.locked():
+            self._remove(session_id, "idle")
+            return None
+        return entry
+
+    def _rewind(self, client: LlmChat) -> bool:
+        initial = self._initial_messages.get(id(client))
+        if initial is None:
+            return False
+        client.messages[:] = initial
+        return True
+
+    def _remove(self, session_id: str, reason: str):
+        entry = self._sessions.pop(session_id)
+        self._bytes -= entry.size
+        self.evictions[reason] += 1
+
+    def _evict(self):
+        while len(self._sessions) > self.max_sessions:
+            self._remove(next(iter(self._sessions)), "lru")
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            self._remove(next(iter(self._sessions)), "memory")
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(max(self.idle_ttl / 4, 1))
+            cutoff = time.monotonic() - self.idle_ttl
+            # Oldest first, so stop at the first recently used session
+            for session_id, entry in list(self._sessions.items()):
+                if entry.last_used > cutoff:
+                    break
+                if not entry.lock.locked():
+                    self._remove(session_id, "idle")
+
+    def render_metrics(self) -> List[str]:
+        """Prometheus lines for pool hits, misses, evictions and size"""
+        lines = [
+            "# HELP llm_client_pool_requests_total Client lookups by pool and result.",
+            "# TYPE llm_client_pool_requests_total counter",
+        ]
+        for pool in ("session", "shared"):
+            lines.append(f'llm_client_pool_requests_total{{pool="{pool}",result="hit"}} {self.hits[pool]}')
+            lines.append(f'llm_client_pool_requests_total{{pool="{pool}",result="miss"}} {self.misses[pool]}')
+        lines += [
+            "# HELP llm_client_pool_evictions_total Session clients dropped, by reason.",
+            "# TYPE llm_client_pool_evictions_total counter",
+        ]
+        lines += [f'llm_client_pool_evictions_total{{reason="{reason}"}} {count}' for reason, count in self.evictions.items()]
+        lines += [
+            "# HELP llm_client_pool_clients Live clients held.",
+            "# TYPE llm_client_pool_clients gauge",
+            f'llm_client_pool_clients{{pool="session"}} {len(self._sessions)}',
+            f'llm_client_pool_clients{{pool="shared"}} {sum(len(idle) for idle in self._shared.values())}',
+            "# HELP llm_client_pool_bytes Estimated prompt and history text held by session clients.",
+            "# TYPE llm_client_pool_bytes gauge",
+            f"llm_client_pool_bytes {self._bytes}",
+        ]
+        return lines
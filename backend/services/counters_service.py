@@ -0,0 +1,174 @@
+from config import settings
+from database import get_database
+from models import ContactStatus
+from datetime import datetime
+from collections import Counter
+from enum import Enum
+from itertools import combinations
+import logging
+from typing import Dict, Any, Optional, Tuple
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+# List endpoint filters whose totals are maintained, per collection. Every
+# combination of them gets a counter so any filtered page can report a total
+# without counting documents.
+COUNTED_FILTERS: Dict[str, Tuple[str, ...]] = {
+    "contact_forms": ("status",),
+    "bookings": ("status",),
+    "portfolio": ("service_type", "is_featured"),
+    "testimonials": ("is_featured",),
+}
+
+def _key_value(value: Any) -> str:
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+def filter_key(query: Dict[str, Any]) -> str:
+    """Counter name for an equality filter, e.g. ``is_featured=true,service_type=seo``"""
+    return ",".join(f"{field}={_key_value(value)}" for field, value in sorted(query.items()))
+
+def filter_count_amounts(collection: str, doc: Dict[str, Any], delta: int = 1) -> Dict[str, int]:
+    """Counter increments for adding (or, with ``delta=-1``, removing) a document"""
+    fields = [field for field in COUNTED_FILTERS.get(collection, ()) if doc.get(field) is not None]
+    return {
+        f"filter_counts.{collection}.{filter_key({field: doc[field] for field in combo})}": delta
+        for size in range(1, len(fields) + 1)
+        for combo in combinations(fields, size)
+    }
+
+def filter_count_changes(collection: str, before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, int]:
+    """Counter increments for a document whose filtered fields changed"""
+    amounts = Counter(filter_count_amounts(collection, after))
+    amounts.subtract(filter_count_amounts(collection, before))
+    return {path: delta for path, delta in amounts.items() if delta}
+
+class CountersService:
+    """Materialized totals kept in a single ``counters`` document.
+
+    The create and update endpoints ``$inc`` the relevant fields as they
+    write, so reading the totals never scans a collection. A periodic
+    reconciliation recounts everything from source and overwrites any drift.
+    """
+
+    DOCUMENT_ID = "totals"
+
+    def __init__(self, reconcile_interval: float):
+        self.reconcile_interval = reconcile_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def increment(self, amounts: Dict[str, int]):
+        """Apply increments (dotted paths allowed) to the totals document"""
+        try:
+            db = get_database()
+            await db.counters.update_one(
+                {"_id": self.DOCUMENT_ID},
+                {"$inc": amounts},
+                upsert=True
+            )
+        except Exception as e:
+            # Drift is repaired by the next reconciliation
+            logger.error(f"Error updating counters: {e}")
+
+    async def get(self) -> Dict[str, Any]:
+        """Read the totals document"""
+        db = get_database()
+        return await db.counters.find_one({"_id": self.DOCUMENT_ID}) or {}
+
+    async def count(self, collection: str, query: Dict[str, Any]) -> int:
+        """Total matching a list endpoint's filter, without a full count.
+
+        Unfiltered totals come from collection metadata and filters in
+        ``COUNTED_FILTERS`` from their maintained counters; anything else
+        (e.g. bookings for one user_id) is a narrow, indexed equality count.
+        """
+        db = get_database()
+        if not query:
+            return await db[collection].estimated_document_count()
+        if set(query) <= set(COUNTED_FILTERS.get(collection, ())):
+            key = filter_key(query)
+            doc = await db.counters.find_one({"_id": self.DOCUMENT_ID}, {f"filter_counts.{collection}.{key}": 1})
+            counts = (doc or {}).get("filter_counts", {}).get(collection, {})
+            # A counter can dip below zero between a racing write and reconciliation
+            return max(counts.get(key, 0), 0)
+        return await db[collection].count_documents(query)
+
+    async def _count_filters(self, collection: str) -> Dict[str, int]:
+        db = get_database()
+        fields = COUNTED_FILTERS[collection]
+        counts: Counter = Counter()
+        pipeline = [{"$group": {"_id": {field: f"${field}" for field in fields}, "count": {"$sum": 1}}}]
+        async for row in db[collection].aggregate(pipeline):
+            for path, delta in filter_count_amounts(collection, row["_id"], row["count"]).items():
+                counts[path.rsplit(".", 1)[1]] += delta
+        return dict(counts)
+
+    async def reconcile(self) -> Dict[str, Any]:
+        """Recount every total from the source collections and fix drift"""
+        db = get_database()
+
+        contacts_by_status = {status.value: 0 for status in ContactStatus}
+        async for row in db.contact_forms.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            if row["_id"] in contacts_by_status:
+                contacts_by_status[row["_id"]] = row["count"]
+
+        totals = {
+            "contacts": await db.contact_forms.count_documents({}),
+            "contacts_by_status": contacts_by_status,
+            "bookings": await db.bookings.count_documents({}),
+            "chat_sessions": await db.chat_sessions.count_documents({}),
+            "portfolio_items": await db.portfolio.count_documents({}),
+            "filter_counts": {collection: await self._count_filters(collection) for collection in COUNTED_FILTERS},
+        }
+
+        previous = await self.get()
+        drift = {
+            key: value - previous.get(key, 0)
+            for key, value in totals.items()
+            if not isinstance(value, dict) and value != previous.get(key, 0)
+        }
+        if drift:
+            logger.warning(f"Counters drifted from source, corrected by: {drift}")
+
+        await db.counters.replace_one(
+            {"_id": self.DOCUMENT_ID},
+            {**totals, "reconciled_at": datetime.utcnow()},
+            upsert=True
+        )
+        return totals
+
+    async def start(self):
+        """Seed the counters if missing and start the reconciliation loop"""
+        if self._task:
+            return
+        try:
+            if not await self.get():
+                await self.reconcile()
+        except Exception as e:
+            logger.error(f"Error seeding counters: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the reconciliation loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Error reconciling counters: {e}")
+
+# Create global counters service instance
+counters_service = CountersService(reconcile_interval=settings.counters_reconcile_interval)
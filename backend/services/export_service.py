@@ -0,0 +1,79 @@
+from pydantic import BaseModel
+from config import settings
+from models import ContactForm, Booking, ChatMessage, ExportCollection, ExportFormat
+from query_shapes import NEWEST_FIRST, OLDEST_FIRST
+from services.serialization import model_projection
+from datetime import datetime, date
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Type
+import csv
+import io
+import json
+
+# Source collection, model (for CSV columns) and sort order of each export
+EXPORTS: Dict[ExportCollection, Dict[str, Any]] = {
+    ExportCollection.CONTACTS: {"collection": "contact_forms", "model": ContactForm, "sort": NEWEST_FIRST},
+    ExportCollection.BOOKINGS: {"collection": "bookings", "model": Booking, "sort": NEWEST_FIRST},
+    ExportCollection.CHATS: {"collection": "chat_messages", "model": ChatMessage, "sort": OLDEST_FIRST},
+}
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+# Leading characters that make spreadsheet apps evaluate a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Contact fields come from the public form; neutralize formula
+        # injection so the export is safe to open in Excel or Sheets
+        return "'" + value
+    return _json_default(value) if isinstance(value, (datetime, date, Enum)) else value
+
+async def stream_export(db, export: ExportCollection, query: Dict[str, Any], export_format: ExportFormat) -> AsyncIterator[bytes]:
+    """Stream a collection as NDJSON or CSV, one chunk per cursor batch.
+
+    Only one batch of documents is held in memory at a time, so memory use
+    is the same for a thousand documents or ten million.
+    """
+    spec = EXPORTS[export]
+    model: Type[BaseModel] = spec["model"]
+    columns: List[str] = list(model.model_fields)
+
+    cursor = db[spec["collection"]].find(query, model_projection(model)).sort(list(spec["sort"]))
+    cursor = cursor.batch_size(settings.export_batch_size)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == ExportFormat.CSV:
+        writer.writerow(columns)
+
+    rows = 0
+    async for doc in cursor:
+        if export_format == ExportFormat.CSV:
+            writer.writerow([_csv_value(doc.get(column)) for column in columns])
+        else:
+            buffer.write(json.dumps(doc, default=_json_default))
+            buffer.write("\n")
+
+        rows += 1
+        if rows % settings.export_batch_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,149 @@
+from database import get_database
+from models import ContactStatus, ServiceType
+from datetime import datetime, date
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = [status.value for status in ContactStatus]
+
+class FunnelService:
+    """Incrementally maintained lead funnel analytics.
+
+    Every contact status change is appended to ``contact_transitions`` and
+    folded into one ``funnel_daily`` document per day and service type
+    (stage entries, transition counts and time-in-stage sums), so a report
+    over any range only reads days x service types small documents and
+    never scans ``contact_forms``.
+    """
+
+    async def record_entry(self, service: ServiceType, at: datetime):
+        """Count a new lead entering the first stage"""
+        try:
+            db = get_database()
+            await self._fold(db, service, at, {f"entered.{ContactStatus.NEW.value}": 1})
+        except Exception as e:
+            logger.error(f"Error recording funnel entry: {e}")
+
+    async def record_transition(
+        self,
+        contact_id: str,
+        service: ServiceType,
+        from_status: ContactStatus,
+        to_status: ContactStatus,
+        entered_at: datetime,
+        at: datetime
+    ):
+        """Append a status transition and fold it into the daily aggregates"""
+        seconds_in_stage = max((at - entered_at).total_seconds(), 0.0)
+        try:
+            db = get_database()
+            await db.contact_transitions.insert_one({
+                "contact_id": contact_id,
+                "service": service.value,
+                "from_status": from_status.value,
+                "to_status": to_status.value,
+                "entered_at": entered_at,
+                "seconds_in_stage": seconds_in_stage,
+                "created_at": at,
+            })
+            await self._fold(
+                db, service, at,
+                {
+                    f"entered.{to_status.value}": 1,
+                    f"exited.{from_status.value}": 1,
+                    f"transitions.{from_status.value}->{to_status.value}": 1,
+                    f"time_in_stage.{from_status.value}.seconds": seconds_in_stage,
+                },
+                minimums={f"time_in_stage.{from_status.value}.min": seconds_in_stage},
+                maximums={f"time_in_stage.{from_status.value}.max": seconds_in_stage},
+            )
+        except Exception as e:
+            logger.error(f"Error recording funnel transition: {e}")
+
+    async def _fold(self, db, service: ServiceType, at: datetime, increments: Dict[str, float],
+                    minimums: Optional[Dict[str, float]] = None, maximums: Optional[Dict[str, float]] = None):
+        day = at.date().isoformat()
+        update: Dict[str, Any] = {
+            "$inc": increments,
+            "$setOnInsert": {"funnel_date": day, "service": service.value},
+        }
+        if minimums:
+            update["$min"] = minimums
+        if maximums:
+            update["$max"] = maximums
+        await db.funnel_daily.update_one({"_id": f"{day}:{service.value}"}, update, upsert=True)
+
+    async def report(self, start: date, end: date, service: Optional[ServiceType] = None) -> Dict[str, Any]:
+        """Aggregate the daily funnel documents for a date range"""
+        db = get_database()
+
+        query: Dict[str, Any] = {"funnel_date": {"$gte": start.isoformat(), "$lte": end.isoformat()}}
+        if service:
+            query["service"] = service.value
+        docs = await db.funnel_daily.find(query).to_list(length=None)
+
+        total = _empty_totals()
+        by_service: Dict[str, Dict[str, Any]] = {}
+        for doc in docs:
+            _accumulate(total, doc)
+            _accumulate(by_service.setdefault(doc["service"], _empty_totals()), doc)
+
+        return {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "service": service.value if service else None,
+            **_summarize(total),
+            "by_service": {name: _summarize(totals) for name, totals in sorted(by_service.items())},
+        }
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"entered": {}, "exited": {}, "transitions": {}, "time_in_stage": {}}
+
+def _accumulate(totals: Dict[str, Any], doc: Dict[str, Any]):
+    for field in ("entered", "exited", "transitions"):
+        for key, value in doc.get(field, {}).items():
+            totals[field][key] = totals[field].get(key, 0) + value
+    for stage, stats in doc.get("time_in_stage", {}).items():
+        current = totals["time_in_stage"].setdefault(stage, {"seconds": 0.0, "min": None, "max": None})
+        current["seconds"] += stats.get("seconds", 0.0)
+        if stats.get("min") is not None:
+            current["min"] = stats["min"] if current["min"] is None else min(current["min"], stats["min"])
+        if stats.get("max") is not None:
+            current["max"] = stats["max"] if current["max"] is None else max(current["max"], stats["max"])
+
+def _summarize(totals: Dict[str, Any]) -> Dict[str, Any]:
+    stages = []
+    previous_entered = None
+    for stage in STAGES:
+        entered = totals["entered"].get(stage, 0)
+        exited = totals["exited"].get(stage, 0)
+        time_in_stage = totals["time_in_stage"].get(stage)
+        stages.append({
+            "status": stage,
+            "entered": entered,
+            "exited": exited,
+            "conversion_from_previous": _rate(entered, previous_entered),
+            "avg_seconds_in_stage": round(time_in_stage["seconds"] / exited, 1) if time_in_stage and exited else None,
+            "min_seconds_in_stage": time_in_stage["min"] if time_in_stage else None,
+            "max_seconds_in_stage": time_in_stage["max"] if time_in_stage else None,
+        })
+        previous_entered = entered
+
+    return {
+        "stages": stages,
+        "transitions": totals["transitions"],
+        "conversion_rate": _rate(
+            totals["entered"].get(ContactStatus.CONVERTED.value, 0),
+            totals["entered"].get(ContactStatus.NEW.value, 0)
+        ),
+    }
+
+def _rate(numerator: int, denominator: Optional[int]) -> Optional[float]:
+    if not denominator:
+        return None
+    return round(numerator / denominator, 4)
+
+# Create global funnel service instance
+funnel_service = FunnelService()
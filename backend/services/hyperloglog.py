@@ -0,0 +1,67 @@
+import hashlib
+import math
+from typing import Iterable, Optional
+
+class HyperLogLog:
+    """HyperLogLog cardinality sketch.
+
+    With the default precision of 12 the sketch is 4096 one-byte registers
+    (4 KB) regardless of how many items are added, and estimates have a
+    standard error of 1.04 / sqrt(4096) ~= 1.6%. Sketches of the same
+    precision merge losslessly by taking the register-wise maximum, so
+    per-worker or per-day sketches can be combined into one for any range.
+    """
+
+    def __init__(self, precision: int = 12, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+        if len(self.registers) != self.size:
+            raise ValueError("Register array does not match sketch precision")
+
+    @property
+    def standard_error(self) -> float:
+        """Relative standard error of the estimate"""
+        return 1.04 / math.sqrt(self.size)
+
+    def add(self, value: bytes):
+        """Add an item to the sketch"""
+        hashed = int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        """Merge another sketch into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """Estimate the number of distinct items added"""
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size ** 2 / sum(2.0 ** -register for register in self.registers)
+
+        # Linear counting is more accurate while many registers are still empty
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, registers: bytes, precision: int = 12) -> "HyperLogLog":
+        return cls(precision, registers)
+
+    @classmethod
+    def union(cls, sketches: Iterable["HyperLogLog"], precision: int = 12) -> "HyperLogLog":
+        """Merge several sketches into a new one"""
+        result = cls(precision)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
@@ -0,0 +1,182 @@
+from config import settings
+from database import get_database
+from services.cache_service import TTLCache
+from services.media_service import media_store, MediaNotFoundError
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import io
+import logging
+import multiprocessing
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # variants are skipped and originals served instead
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Longest edge of each variant, in pixels; images are never upscaled
+VARIANT_SIZES: Dict[str, int] = {
+    "thumb": 320,
+    "medium": 960,
+    "full": 1920,
+}
+
+WEBP_QUALITY = 80
+FALLBACK_QUALITY = 82
+
+class ImageTooLargeError(ValueError):
+    """An image whose dimensions exceed ``image_max_pixels``"""
+
+def render_variants(data: bytes, max_pixels: int) -> Dict[str, Dict[str, Any]]:
+    """Decode an image once and encode every variant as WebP plus a JPEG (or,
+    with transparency, PNG) fallback.
+
+    Runs in a worker process: it takes and returns plain bytes so nothing
+    but the payloads crosses the process boundary. Images over
+    ``max_pixels`` are refused before any pixel data is decoded, so a small
+    file declaring huge dimensions cannot exhaust a worker's memory.
+    """
+    largest = max(VARIANT_SIZES.values())
+    # Opening reads only the header; pixels are decoded on first access
+    with Image.open(io.BytesIO(data)) as source:
+        width, height = source.size
+        if width * height > max_pixels:
+            raise ImageTooLargeError(f"Image is {width}x{height}, over {max_pixels} pixels")
+        source.seek(0)  # first frame of animations
+        # Let the JPEG decoder downscale while decoding (at no less than the
+        # largest variant), which is far cheaper than resizing afterwards
+        source.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    variants = {}
+    # Largest first, so each smaller variant is resized from the previous one
+    for name, size in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+        image.thumbnail((size, size), Image.LANCZOS)
+
+        webp = io.BytesIO()
+        image.save(webp, "WEBP", quality=WEBP_QUALITY, method=4)
+        fallback = io.BytesIO()
+        if has_alpha:
+            image.save(fallback, "PNG", optimize=True)
+            fallback_type = "image/png"
+        else:
+            image.save(fallback, "JPEG", quality=FALLBACK_QUALITY, optimize=True, progressive=True)
+            fallback_type = "image/jpeg"
+
+        variants[name] = {
+            "width": image.width,
+            "height": image.height,
+            "image/webp": webp.getvalue(),
+            fallback_type: fallback.getvalue(),
+        }
+    return variants
+
+class ImagePipeline:
+    """Generates sized variants of stored images off the event loop.
+
+    Decoding, resizing and encoding run in a ``ProcessPoolExecutor``. Each
+    variant is itself a content-addressed blob; the mapping from an
+    original's hash to its variants lives in ``media_variants`` (and, being
+    immutable, in a local cache), so an image is processed once however many
+    documents use it.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._cache = TTLCache("media_variants", max_entries=4096, default_ttl=24 * 60 * 60)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking a process that runs the event loop, Motor's threads and
+            # the analytics tasks copies their locks mid-use; start workers
+            # from a clean forkserver instead
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("forkserver")
+            )
+        return self._executor
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def get_variants(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Variant hashes of an original, or None if not generated (yet)"""
+        found, variants = self._cache.get(("variants", digest))
+        if found:
+            return variants
+        doc = await get_database().media_variants.find_one({"_id": digest})
+        if doc is None:
+            return None
+        self._cache.set(("variants", digest), doc["variants"])
+        return doc["variants"]
+
+    async def process(self, digest: str):
+        """Generate and store the variants of one original, once"""
+        if Image is None:
+            return
+        if await self.get_variants(digest) is not None:
+            return
+        future = self._inflight.get(digest)
+        if future is None:
+            future = asyncio.ensure_future(self._process(digest))
+            self._inflight[digest] = future
+            future.add_done_callback(lambda _: self._inflight.pop(digest, None))
+        await asyncio.shield(future)
+
+    async def _process(self, digest: str):
+        grid_out = await media_store.open(digest)
+        if not (grid_out.metadata or {}).get("contentType", "").startswith("image/"):
+            return
+        data = await grid_out.read()
+
+        loop = asyncio.get_running_loop()
+        rendered = await loop.run_in_executor(self._pool(), render_variants, data, settings.image_max_pixels)
+
+        variants: Dict[str, Dict[str, Any]] = {}
+        for name, variant in rendered.items():
+            stored: Dict[str, Any] = {"width": variant.pop("width"), "height": variant.pop("height")}
+            for content_type, payload in variant.items():
+                stored[content_type], _ = await media_store.store_bytes(payload, content_type)
+            variants[name] = stored
+
+        await get_database().media_variants.update_one(
+            {"_id": digest},
+            {"$set": {"variants": variants, "created_at": datetime.utcnow()}},
+            upsert=True
+        )
+        self._cache.set(("variants", digest), variants)
+
+    async def process_all(self, digests: List[str]):
+        """Background task: generate variants for every new original"""
+        for digest in digests:
+            try:
+                await self.process(digest)
+            except MediaNotFoundError:
+                logger.warning(f"Cannot generate variants of missing media {digest}")
+            except ImageTooLargeError as e:
+                logger.warning(f"Skipping variants of {digest}: {e}")
+            except Exception as e:
+                logger.error(f"Error generating variants of {digest}: {e}")
+
+def choose_format(variant: Dict[str, Any], accept: str) -> Tuple[str, str]:
+    """``(content_type, hash)`` of a variant for a request's Accept header:
+    WebP when the client takes it, otherwise the fallback"""
+    if "image/webp" in accept and "image/webp" in variant:
+        return "image/webp", variant["image/webp"]
+    for content_type in ("image/jpeg", "image/png"):
+        if content_type in variant:
+            return content_type, variant[content_type]
+    return "image/webp", variant["image/webp"]
+
+# Create global image pipeline instance
+image_pipeline = ImagePipeline(workers=settings.image_workers)
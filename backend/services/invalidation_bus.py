@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class InvalidationEvent:
+    """A catalog collection changed.
+
+    ``version`` and ``updated_at`` are set when the event comes from a
+    version bump; raw document changes only name the collection.
+    """
+    collection: str
+    version: Optional[int] = None
+    updated_at: Optional[datetime] = None
+
+class InvalidationBus:
+    """In-process fan-out of invalidation events to the caches.
+
+    Events come from this worker's own writes and, through the change stream
+    listener, from writes handled by every other worker. Handlers are
+    synchronous and must be idempotent, since a local write is seen twice.
+    """
+
+    def __init__(self):
+        self._handlers: List[Callable[[InvalidationEvent], None]] = []
+
+    def subscribe(self, handler: Callable[[InvalidationEvent], None]):
+        self._handlers.append(handler)
+
+    def publish(self, event: InvalidationEvent):
+        for handler in self._handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"Error handling invalidation of {event.collection}: {e}")
+
+# Create global invalidation bus instance
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,224 @@
+from config import settings
+from database import get_database
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pymongo.errors import DuplicateKeyError
+from gridfs.errors import NoFile
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import base64
+import binascii
+import hashlib
+import logging
+import re
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MEDIA_URL_PREFIX = f"{settings.api_prefix}/media/"
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Leading bytes of the formats we accept, most specific first
+MAGIC_NUMBERS: List[Tuple[bytes, int, str]] = [
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png"),
+    (b"\xff\xd8\xff", 0, "image/jpeg"),
+    (b"GIF87a", 0, "image/gif"),
+    (b"GIF89a", 0, "image/gif"),
+    (b"WEBP", 8, "image/webp"),
+    (b"%PDF-", 0, "application/pdf"),
+]
+
+# Bytes needed to recognise every format above
+SNIFF_LENGTH = 12
+
+# Image fields kept in the media store, per collection
+IMAGE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "portfolio": ("images",),
+    "testimonials": ("image",),
+}
+
+class MediaNotFoundError(LookupError):
+    """Raised for a hash with no stored blob"""
+
+class MediaTypeNotAllowedError(ValueError):
+    """Raised for inline data whose content is not one of ``allowed_file_types``"""
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """MIME type from a file's first bytes, or None if unrecognised"""
+    for magic, offset, content_type in MAGIC_NUMBERS:
+        if head[offset:offset + len(magic)] == magic:
+            if content_type == "image/webp" and not head.startswith(b"RIFF"):
+                continue
+            return content_type
+    return None
+
+def media_url(digest: str) -> str:
+    return f"{MEDIA_URL_PREFIX}{digest}"
+
+def media_digests(doc: Dict[str, Any], fields: Iterable[str]) -> List[str]:
+    """Hashes of the stored blobs a document's image fields point at"""
+    digests = []
+    for field in fields:
+        value = doc.get(field)
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, str) and item.startswith(MEDIA_URL_PREFIX):
+                digest = item[len(MEDIA_URL_PREFIX):]
+                if SHA256_PATTERN.match(digest) and digest not in digests:
+                    digests.append(digest)
+    return digests
+
+def is_external_reference(value: str) -> bool:
+    """Whether an image field already points somewhere instead of holding data"""
+    return value.startswith((MEDIA_URL_PREFIX, "http://", "https://"))
+
+def decode_inline_image(value: str) -> Optional[bytes]:
+    """Bytes of a base64 image (bare or ``data:`` URI), or None if it is not one"""
+    if value.startswith("data:"):
+        header, _, value = value.partition(",")
+        if ";base64" not in header:
+            return None
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+class MediaStore:
+    """Content-addressed blobs in GridFS.
+
+    Each blob's GridFS filename is the SHA-256 of its content, which a
+    unique index keeps to one copy. Uploads are written under a temporary
+    name and renamed to their hash once complete, so identical concurrent
+    uploads race on the rename rather than on each other's chunks, and the
+    loser simply deletes its copy.
+    """
+
+    def _bucket(self) -> AsyncIOMotorGridFSBucket:
+        return AsyncIOMotorGridFSBucket(
+            get_database(), bucket_name=settings.media_bucket, chunk_size_bytes=settings.media_chunk_size
+        )
+
+    async def exists(self, digest: str) -> bool:
+        files = get_database()[f"{settings.media_bucket}.files"]
+        return await files.find_one({"filename": digest}, {"_id": 1}) is not None
+
+    async def store_stream(self, chunks: AsyncIterator[bytes], content_type: str) -> Tuple[str, int, bool]:
+        """Store a blob from chunks; returns ``(sha256, length, created)``"""
+        bucket = self._bucket()
+        hasher = hashlib.sha256()
+        length = 0
+        grid_in = bucket.open_upload_stream(
+            f"pending-{uuid.uuid4()}", metadata={"contentType": content_type}
+        )
+        try:
+            async for chunk in chunks:
+                hasher.update(chunk)
+                length += len(chunk)
+                await grid_in.write(chunk)
+            await grid_in.close()
+        except BaseException:
+            await grid_in.abort()
+            raise
+
+        digest = hasher.hexdigest()
+        try:
+            await bucket.rename(grid_in._id, digest)
+            return digest, length, True
+        except DuplicateKeyError:
+            # Identical content is already stored
+            await bucket.delete(grid_in._id)
+            return digest, length, False
+
+    async def store_bytes(self, data: bytes, content_type: str) -> Tuple[str, bool]:
+        """Store a blob held in memory; returns ``(sha256, created)``"""
+        digest = hashlib.sha256(data).hexdigest()
+        if await self.exists(digest):
+            return digest, False
+
+        async def chunks():
+            for start in range(0, len(data), settings.media_chunk_size):
+                yield data[start:start + settings.media_chunk_size]
+
+        digest, _, created = await self.store_stream(chunks(), content_type)
+        return digest, created
+
+    async def open(self, digest: str):
+        """Open a stored blob for reading (a GridOut with length/metadata)"""
+        if not SHA256_PATTERN.match(digest):
+            raise MediaNotFoundError(digest)
+        try:
+            return await self._bucket().open_download_stream_by_name(digest)
+        except NoFile:
+            raise MediaNotFoundError(digest)
+
+    async def externalize(self, value: str) -> str:
+        """Move an inline base64 image into the store and return its URL.
+
+        References and anything that does not decode to a recognised file
+        type are returned unchanged. Recognised types outside
+        ``allowed_file_types`` raise ``MediaTypeNotAllowedError``, as they
+        would if sent to the upload endpoint.
+        """
+        if is_external_reference(value):
+            return value
+        data = decode_inline_image(value)
+        if data is None:
+            return value
+        content_type = sniff_content_type(data[:SNIFF_LENGTH])
+        if content_type is None:
+            return value
+        if content_type not in settings.allowed_file_types:
+            raise MediaTypeNotAllowedError(f"File type not allowed: {content_type}")
+        digest, _ = await self.store_bytes(data, content_type)
+        return media_url(digest)
+
+    async def externalize_fields(self, doc: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+        """Externalize the inline images in a document's image fields, which
+        may hold one image or a list of them"""
+        updated = {}
+        for field in fields:
+            value = doc.get(field)
+            if isinstance(value, str):
+                updated[field] = await self.externalize(value)
+            elif isinstance(value, list):
+                updated[field] = [await self.externalize(item) if isinstance(item, str) else item for item in value]
+        return updated
+
+async def iter_range(grid_out, start: int, end: int) -> AsyncIterator[bytes]:
+    """Yield bytes ``start..end`` (inclusive) of a stored blob, chunk by chunk"""
+    grid_out.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = await grid_out.read(min(remaining, settings.media_chunk_size))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+def parse_range(header: Optional[str], length: int) -> Optional[Tuple[int, int]]:
+    """The single byte range requested, as inclusive ``(start, end)``.
+
+    Returns None for a missing, malformed or multi-range header (which is
+    answered with the whole blob) and raises ValueError when the range lies
+    outside the blob.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    first, separator, last = header[len("bytes="):].strip().partition("-")
+    if not separator or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), length - 1) if last else length - 1
+    else:
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        start, end = max(length - int(last), 0), length - 1
+
+    if start >= length:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+# Create global media store instance
+media_store = MediaStore()
@@ -0,0 +1,108 @@
+from typing import Callable, Dict, List, Tuple
+
+# Each power-of-two range is split into 2**SUB_BUCKET_BITS linear buckets,
+# which bounds the relative error of a reported quantile to about 6%
+SUB_BUCKET_BITS = 4
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+# Highest trackable value, in microseconds (slower requests are clamped)
+MAX_TRACKABLE_US = 60 * 1_000_000
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+def _bucket_index(value_us: int) -> int:
+    if value_us < 2 * SUB_BUCKET_COUNT:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS - 1
+    return 2 * SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_COUNT + ((value_us >> shift) - SUB_BUCKET_COUNT)
+
+def _bucket_bounds(index: int) -> Tuple[int, int]:
+    if index < 2 * SUB_BUCKET_COUNT:
+        return index, index + 1
+    shift = (index - 2 * SUB_BUCKET_COUNT) // SUB_BUCKET_COUNT + 1
+    mantissa = (index - 2 * SUB_BUCKET_COUNT) % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT
+    return mantissa << shift, (mantissa + 1) << shift
+
+BUCKET_COUNT = _bucket_index(MAX_TRACKABLE_US) + 1
+
+class LatencyHistogram:
+    """Fixed-bucket, log-linear (HDR-style) latency histogram"""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        """Record a duration in seconds"""
+        value_us = min(int(seconds * 1_000_000), MAX_TRACKABLE_US)
+        self.counts[_bucket_index(max(value_us, 0))] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self, quantiles=QUANTILES) -> Dict[float, float]:
+        """Compute quantiles in seconds in a single pass over the buckets"""
+        result = {}
+        if not self.count:
+            return {q: 0.0 for q in quantiles}
+
+        targets = sorted(quantiles)
+        position = 0
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            seen += bucket_count
+            while position < len(targets) and seen >= targets[position] * self.count:
+                lower, upper = _bucket_bounds(index)
+                result[targets[position]] = (lower + upper) / 2 / 1_000_000
+                position += 1
+            if position == len(targets):
+                break
+        return result
+
+class MetricsRegistry:
+    """In-memory request latency metrics keyed by route template, method and status"""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str, int], LatencyHistogram] = {}
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        """Add a callable returning extra exposition lines on each scrape"""
+        self.collectors.append(collector)
+
+    def observe(self, route: str, method: str, status: int, seconds: float):
+        """Record a request duration"""
+        key = (route, method, status)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        name = "http_request_duration_seconds"
+        lines = [
+            f"# HELP {name} HTTP request latency by route template, method and status.",
+            f"# TYPE {name} summary",
+        ]
+
+        for (route, method, status), histogram in sorted(self.histograms.items()):
+            labels = f'route="{_escape(route)}",method="{method}",status="{status}"'
+            for quantile, value in histogram.quantiles().items():
+                lines.append(f'{name}{{{labels},quantile="{quantile}"}} {value:.6f}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        for collector in self.collectors:
+            lines.extend(collector())
+
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# Create global metrics registry instance
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,100 @@
+from query_shapes import NEWEST_FIRST, OLDEST_FIRST, HIGHEST_RATED
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import base64
+import json
+
+SortSpec = Sequence[Tuple[str, int]]
+
+class InvalidCursorError(ValueError):
+    """Raised for cursor tokens that cannot be decoded for a sort order"""
+
+class Page(NamedTuple):
+    """One page of a list endpoint"""
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    number: int
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    # Values end up in the query, so anything but a scalar or our datetime
+    # wrapper would be an operator smuggled in by the client
+    if isinstance(value, dict) and set(value) == {"$dt"} and isinstance(value["$dt"], str):
+        try:
+            return datetime.fromisoformat(value["$dt"])
+        except ValueError as e:
+            raise InvalidCursorError("Malformed cursor") from e
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    raise InvalidCursorError("Malformed cursor")
+
+def encode_cursor(values: List[Any], page: int) -> str:
+    """Opaque, URL-safe token for a position in a sort order and the number
+    of the page starting there"""
+    payload = json.dumps(
+        {"after": [_encode_value(value) for value in values], "page": page},
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token: str, sort: SortSpec) -> Tuple[List[Any], int]:
+    """Sort key values and page number encoded in a cursor token"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, page = payload["after"], payload["page"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if not isinstance(page, int) or isinstance(page, bool) or page < 1:
+        raise InvalidCursorError("Malformed cursor")
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise InvalidCursorError("Cursor does not match the sort order")
+    return [_decode_value(value) for value in values], page
+
+def keyset_query(query: Dict[str, Any], sort: SortSpec, values: List[Any]) -> Dict[str, Any]:
+    """Restrict a query to documents strictly after a position in a sort order"""
+    branches = []
+    for position, (field, direction) in enumerate(sort):
+        branch = {prefix_field: values[index] for index, (prefix_field, _) in enumerate(sort[:position])}
+        branch[field] = {"$lt" if direction < 0 else "$gt": values[position]}
+        branches.append(branch)
+
+    after = {"$or": branches}
+    return {"$and": [query, after]} if query else after
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    sort: SortSpec,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> Page:
+    """Fetch one page and the cursor for the next one.
+
+    With a cursor the page starts right after it, so page N costs the same
+    index range scan as page 1; ``skip`` is only honoured without a cursor,
+    for backward compatibility. One extra document is read to tell whether
+    a next page exists.
+    """
+    if cursor:
+        values, number = decode_cursor(cursor, sort)
+        query = keyset_query(query, sort, values)
+    else:
+        number = -(-skip // limit) + 1
+
+    find = collection.find(query, projection).sort(list(sort))
+    if skip and not cursor:
+        find = find.skip(skip)
+    docs = await find.limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor([docs[-1].get(field) for field, _ in sort], number + 1)
+    return Page(docs, next_cursor, number)
@@ -0,0 +1,28 @@
+from pydantic import BaseModel
+from typing import Dict, Iterable, Optional, Type
+
+class InvalidFieldsError(ValueError):
+    """Raised when a ``fields=`` parameter names fields the model does not have"""
+
+def build_projection(
+    model: Type[BaseModel],
+    fields: Optional[str],
+    summary_exclude: Iterable[str],
+    required: Iterable[str] = ("id",)
+) -> Dict[str, int]:
+    """MongoDB projection for a list endpoint's ``fields=`` parameter.
+
+    Without ``fields`` the summary view is returned: every field except the
+    heavy ones in ``summary_exclude``. With ``fields`` only the requested
+    fields (plus ``required`` ones such as the sort keys) are read.
+    """
+    if not fields:
+        excluded = set(summary_exclude)
+        return {"_id": 0, **{field: 1 for field in model.model_fields if field not in excluded}}
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise InvalidFieldsError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    return {"_id": 0, **{field: 1 for field in requested | set(required)}}
@@ -0,0 +1,158 @@
+from models import SearchScope, SearchMode
+from query_shapes import NEWEST_FIRST
+from services.pagination import Page, decode_cursor, encode_cursor, keyset_query
+from pymongo.errors import ExecutionTimeout
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import re
+
+# Relevance order for full-text results; ``id`` breaks ties across both
+# collections, so one cursor pages through the merged results
+BY_RELEVANCE = (("score", -1), ("id", -1))
+
+MAX_PREFIX_TOKENS = 5
+# Shorter words match too much of the index to be worth scanning
+MIN_PREFIX_LENGTH = 2
+# Budget for one collection's prefix scan before the search is refused
+PREFIX_MAX_TIME_MS = 500
+
+_TOKEN_SPLIT = re.compile(r"[^\w@.+-]+|(?<=\w)[.@+-](?=\w)")
+
+class SearchTooBroadError(ValueError):
+    """Raised when a prefix search cannot finish within its time budget"""
+
+@dataclass(frozen=True)
+class SearchTarget:
+    """A searchable collection.
+
+    ``text_fields`` are covered by the collection's text index (see
+    ``EXPLICIT_INDEXES``); ``term_fields`` feed the ``search_terms`` array
+    that prefix mode range-scans.
+    """
+    collection: str
+    text_fields: Tuple[str, ...]
+    term_fields: Tuple[str, ...]
+    result_fields: Tuple[str, ...]
+
+SEARCH_TARGETS: Dict[SearchScope, SearchTarget] = {
+    SearchScope.CONTACTS: SearchTarget(
+        "contact_forms",
+        ("name", "email", "message"),
+        ("name", "email"),
+        ("id", "name", "email", "service", "status", "created_at"),
+    ),
+    SearchScope.PORTFOLIO: SearchTarget(
+        "portfolio",
+        ("title", "description", "technologies"),
+        ("title", "technologies"),
+        ("id", "title", "client_name", "service_type", "technologies", "created_at"),
+    ),
+}
+
+def _values(doc: Dict[str, Any], fields: Iterable[str]) -> List[str]:
+    values = []
+    for field in fields:
+        value = doc.get(field)
+        if isinstance(value, str):
+            values.append(value)
+        elif isinstance(value, list):
+            values.extend(item for item in value if isinstance(item, str))
+    return values
+
+def search_terms(scope: SearchScope, doc: Dict[str, Any]) -> List[str]:
+    """Lowercased prefix-searchable terms of a document: every word of its
+    term fields plus each whole value, so ``jane.doe@ex`` still matches"""
+    terms = set()
+    for value in _values(doc, SEARCH_TARGETS[scope].term_fields):
+        value = value.lower().strip()
+        if value:
+            terms.add(value)
+            terms.update(token for token in _TOKEN_SPLIT.split(value) if token)
+    return sorted(terms)
+
+def _prefix_tokens(q: str) -> List[str]:
+    return [token for token in q.lower().split() if len(token) >= MIN_PREFIX_LENGTH][:MAX_PREFIX_TOKENS]
+
+def _prefix_query(tokens: List[str]) -> Dict[str, Any]:
+    # Anchored, case-sensitive regexes on the lowercased terms become index
+    # bounds on search_terms, which the index keeps after the sort keys
+    # (see the search shapes in QUERY_SHAPES) so results come out newest
+    # first without a blocking sort
+    clauses = [{"search_terms": {"$regex": f"^{re.escape(token)}"}} for token in tokens]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+async def _search_target(
+    db,
+    scope: SearchScope,
+    q: str,
+    mode: SearchMode,
+    limit: int,
+    after: Optional[List[Any]]
+) -> List[Dict[str, Any]]:
+    target = SEARCH_TARGETS[scope]
+    projection = {"_id": 0, **{field: 1 for field in target.result_fields}}
+
+    if mode == SearchMode.PREFIX:
+        query = _prefix_query(_prefix_tokens(q))
+        if after:
+            query = keyset_query(query, NEWEST_FIRST, after)
+        find = db[target.collection].find(query, projection).sort(list(NEWEST_FIRST))
+        try:
+            # A rare prefix walks the whole index before limit+1 matches turn up
+            docs = await find.limit(limit + 1).max_time_ms(PREFIX_MAX_TIME_MS).to_list(length=limit + 1)
+        except ExecutionTimeout:
+            raise SearchTooBroadError("Prefix search took too long; type more of the word")
+    else:
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": {"$text": {"$search": q}}},
+            {"$project": {**projection, "score": {"$meta": "textScore"}}},
+        ]
+        if after:
+            pipeline.append({"$match": keyset_query({}, BY_RELEVANCE, after)})
+        pipeline += [{"$sort": dict(BY_RELEVANCE)}, {"$limit": limit + 1}]
+        docs = await db[target.collection].aggregate(pipeline).to_list(length=limit + 1)
+
+    return [{"type": scope.value, **doc} for doc in docs]
+
+async def search(
+    db,
+    q: str,
+    mode: SearchMode,
+    scopes: Iterable[SearchScope],
+    limit: int,
+    cursor: Optional[str] = None
+) -> Page:
+    """One page of search results across ``scopes``.
+
+    Full-text mode ranks by text score; prefix (autocomplete) mode returns
+    the newest documents whose terms start with every typed word of at
+    least ``MIN_PREFIX_LENGTH`` characters. Each
+    collection is read limit+1 past the cursor and the results merged, so
+    the same keyset cursor works across collections.
+    """
+    sort = NEWEST_FIRST if mode == SearchMode.PREFIX else BY_RELEVANCE
+    after, number = decode_cursor(cursor, sort) if cursor else (None, 1)
+    q = q.strip()
+    if not q:
+        # Autocomplete sends whitespace-only input too; nothing can match it
+        return Page([], None, number)
+    if mode == SearchMode.PREFIX and not _prefix_tokens(q):
+        # Autocomplete fires from the first keystroke; wait for a longer word
+        return Page([], None, number)
+
+    results = await asyncio.gather(*[
+        _search_target(db, scope, q, mode, limit, after) for scope in scopes
+    ])
+    # Both sort orders are descending on every key
+    merged = sorted(
+        (doc for docs in results for doc in docs),
+        key=lambda doc: tuple(doc[field] for field, _ in sort),
+        reverse=True
+    )
+
+    next_cursor = None
+    if len(merged) > limit:
+        merged = merged[:limit]
+        next_cursor = encode_cursor([merged[-1][field] for field, _ in sort], number + 1)
+    return Page(merged, next_cursor, number)
@@ -0,0 +1,90 @@
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.types import Receive, Scope, Send
+from services.pagination import Page
+from datetime import datetime, date
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, Optional, Type
+import json
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard library encoder
+    orjson = None
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode to JSON bytes in one pass, handling datetimes, enums and models"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with ``dumps``.
+
+    Endpoints that return one directly skip FastAPI's response_model
+    validation and ``jsonable_encoder`` pass, which is what the trusted read
+    paths rely on: documents we wrote ourselves go from Mongo to bytes once.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+@lru_cache(maxsize=None)
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Projection returning exactly a model's fields, so trusted reads keep
+    the same shape as validated ones"""
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+def page_response(page: Page, total: Optional[int], per_page: int) -> FastJSONResponse:
+    """``PaginatedResponse`` body for one page (without ``total`` when it is
+    not known cheaply); the next page's cursor is also sent in X-Next-Cursor"""
+    body = {
+        "items": page.items,
+        "total": total,
+        "page": page.number,
+        "per_page": per_page,
+        "has_next": page.next_cursor is not None,
+        "has_prev": page.number > 1,
+        "next_cursor": page.next_cursor,
+    }
+    if total is None:
+        del body["total"]
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return FastJSONResponse(body, headers=headers)
+
+def sse_event(event: str, data: Any) -> bytes:
+    """One Server-Sent Events message with a JSON payload"""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+class EventStreamResponse(StreamingResponse):
+    """``text/event-stream`` response that always closes its generator.
+
+    StreamingResponse stops iterating when the client disconnects but leaves
+    the generator suspended until garbage collection, so its cleanup (and
+    whatever upstream work it drives) would keep running. Closing it here
+    runs that cleanup as soon as the response ends, for whatever reason.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, content, **kwargs):
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **kwargs.pop("headers", {})}
+        super().__init__(content, headers=headers, **kwargs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
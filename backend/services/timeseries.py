@@ -0,0 +1,77 @@
+from models import AnalyticsMetric, TimeGranularity
+from datetime import date
+from typing import List, Dict, Any
+import numpy as np
+import pandas as pd
+
+# pandas resample rules for the rollups coarser than a day
+RESAMPLE_RULES = {
+    TimeGranularity.WEEKLY: "W-MON",
+    TimeGranularity.MONTHLY: "MS",
+}
+
+# Longest range served at hourly granularity
+MAX_HOURLY_DAYS = 92
+
+HOURS = np.arange(24, dtype="timedelta64[h]")
+
+def daily_series(docs: List[Dict[str, Any]], metric: AnalyticsMetric, start: date, end: date) -> pd.Series:
+    """Dense daily series for a metric, with missing days filled with zero"""
+    frame = pd.DataFrame.from_records(docs, columns=["analytics_date", metric.value])
+    values = pd.to_numeric(frame[metric.value], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    series = pd.Series(values, index=pd.DatetimeIndex(pd.to_datetime(frame["analytics_date"])))
+
+    index = pd.date_range(start, end, freq="D")
+    return series.groupby(level=0).sum().reindex(index, fill_value=0)
+
+def hourly_series(docs: List[Dict[str, Any]], metric: AnalyticsMetric, start: date, end: date) -> pd.Series:
+    """Dense hourly series for a metric from the per-hour breakdowns"""
+    columns = [f"hourly.{metric.value}.{hour:02d}" for hour in range(24)]
+    frame = pd.json_normalize(docs).reindex(columns=["analytics_date", *columns])
+
+    # One row per day, one column per hour, flattened into a single axis
+    values = frame[columns].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+    days = pd.to_datetime(frame["analytics_date"]).to_numpy(dtype="datetime64[h]")
+    stamps = np.add.outer(days, HOURS).ravel()
+    series = pd.Series(values.ravel(), index=pd.DatetimeIndex(stamps))
+
+    index = pd.date_range(pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(hours=23), freq="h")
+    return series.groupby(level=0).sum().reindex(index, fill_value=0)
+
+def build_timeseries(
+    docs: List[Dict[str, Any]],
+    metric: AnalyticsMetric,
+    granularity: TimeGranularity,
+    start: date,
+    end: date,
+    window: int
+) -> Dict[str, Any]:
+    """Roll daily analytics documents up into a time series with a moving
+    average and period-over-period deltas, all computed column-wise"""
+    if granularity == TimeGranularity.HOURLY:
+        series = hourly_series(docs, metric, start, end)
+    else:
+        series = daily_series(docs, metric, start, end)
+        if granularity in RESAMPLE_RULES:
+            series = series.resample(RESAMPLE_RULES[granularity], label="left", closed="left").sum()
+
+    delta = series.diff()
+    previous = series.shift(1)
+    frame = pd.DataFrame({
+        "period": series.index.strftime("%Y-%m-%dT%H:%M:%S" if granularity == TimeGranularity.HOURLY else "%Y-%m-%d"),
+        "value": series.to_numpy(),
+        "moving_average": series.rolling(window, min_periods=1).mean().round(3).to_numpy(),
+        "delta": delta.to_numpy(),
+        # No percentage change is defined from an empty previous period
+        "delta_pct": (delta / previous.where(previous != 0) * 100).round(2).to_numpy(),
+    })
+
+    points = frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+    return {
+        "metric": metric.value,
+        "granularity": granularity.value,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "total": int(series.sum()),
+        "points": points,
+    }
@@ -0,0 +1,209 @@
+from config import settings
+from services.media_service import media_store, sniff_content_type, SNIFF_LENGTH
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+from collections import deque
+from dataclasses import dataclass
+import logging
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Allowance for part headers and boundaries on top of the file bytes
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadError(ValueError):
+    """A request the upload endpoint rejects; ``status_code`` is the HTTP status"""
+    status_code = 400
+
+class UploadTooLargeError(UploadError):
+    """A file or the whole body passed its size limit"""
+    status_code = 413
+
+class UnsupportedFileTypeError(UploadError):
+    """A file's content is not one of ``allowed_file_types``"""
+    status_code = 415
+
+@dataclass
+class StoredUpload:
+    """One file stored from an upload"""
+    filename: Optional[str]
+    sha256: str
+    content_type: str
+    size: int
+    created: bool
+
+class MultipartStream:
+    """Incremental multipart/form-data reader over a request body.
+
+    Starlette's ``request.form()`` parses the whole body into spooled files
+    before the endpoint runs, so limits can only be checked afterwards. Here
+    python-multipart's push parser is fed one network chunk at a time and
+    its callbacks are queued as events, which ``parts()`` and
+    ``Part.chunks()`` consume as async iterators. Nothing larger than one
+    received chunk is ever held, and the caller can stop reading at any
+    point.
+    """
+
+    def __init__(self, request: Request, max_body_size: int):
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise UploadError("Expected a multipart/form-data body")
+        self.request = request
+        self.max_body_size = max_body_size
+        self.received = 0
+        self._pending: Deque[Tuple[str, Any]] = deque()
+        self._header_field = b""
+        self._header_value = b""
+        self._complete = False
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": lambda: self._pending.append(("begin", None)),
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": lambda: self._pending.append(("headers_done", None)),
+            "on_part_data": lambda data, start, end: self._pending.append(("data", bytes(data[start:end]))),
+            "on_part_end": lambda: self._pending.append(("end", None)),
+            "on_end": self._on_end,
+        })
+        self._events = self._read_events()
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._pending.append(("header", (self._header_field.lower(), self._header_value)))
+        self._header_field = self._header_value = b""
+
+    def _on_end(self):
+        self._complete = True
+
+    async def _read_events(self) -> AsyncIterator[Tuple[str, Any]]:
+        async for chunk in self.request.stream():
+            self.received += len(chunk)
+            if self.received > self.max_body_size:
+                raise UploadTooLargeError("Upload exceeds the maximum request size")
+            try:
+                self._parser.write(chunk)
+            except MultipartParseError as e:
+                raise UploadError(f"Malformed multipart body: {e}")
+            while self._pending:
+                yield self._pending.popleft()
+        self._parser.finalize()
+        if not self._complete:
+            # Without the closing boundary the last file may be cut short
+            raise UploadError("Incomplete multipart body")
+        while self._pending:
+            yield self._pending.popleft()
+
+    async def parts(self) -> AsyncIterator["Part"]:
+        """Each part in turn, once its headers are read.
+
+        Whatever the caller leaves unread of a part is skipped before the
+        next one is returned.
+        """
+        headers: Dict[bytes, bytes] = {}
+        async for kind, value in self._events:
+            if kind == "begin":
+                headers = {}
+            elif kind == "header":
+                headers[value[0]] = value[1]
+            elif kind == "headers_done":
+                part = Part(headers, self._events)
+                yield part
+                async for _ in part.chunks():
+                    pass
+
+class Part:
+    """One part of a multipart body, read through ``chunks()``"""
+
+    def __init__(self, headers: Dict[bytes, bytes], events: AsyncIterator[Tuple[str, Any]]):
+        self.headers = headers
+        self._events = events
+        self._done = False
+        _, self.disposition = parse_options_header(headers.get(b"content-disposition", b""))
+
+    @property
+    def name(self) -> Optional[str]:
+        name = self.disposition.get(b"name")
+        return name.decode("utf-8", "replace") if name is not None else None
+
+    @property
+    def filename(self) -> Optional[str]:
+        filename = self.disposition.get(b"filename")
+        return filename.decode("utf-8", "replace") if filename is not None else None
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """The part's bytes as they arrive"""
+        if self._done:
+            return
+        async for kind, value in self._events:
+            if kind == "data":
+                yield value
+            elif kind == "end":
+                break
+        self._done = True
+
+async def limited_file(chunks: AsyncIterator[bytes]) -> Tuple[str, AsyncIterator[bytes]]:
+    """Sniff a file's type from its first bytes and guard its size.
+
+    Returns the content type and an iterator over the whole file that raises
+    ``UploadTooLargeError`` on the first chunk past ``max_file_size``.
+    """
+    head = b""
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= SNIFF_LENGTH:
+            break
+
+    content_type = sniff_content_type(head[:SNIFF_LENGTH])
+    if content_type not in settings.allowed_file_types:
+        raise UnsupportedFileTypeError(f"File type not allowed: {content_type or 'unrecognised'}")
+
+    async def guarded() -> AsyncIterator[bytes]:
+        size = len(head)
+        if size > settings.max_file_size:
+            raise UploadTooLargeError(f"File exceeds {settings.max_file_size} bytes")
+        if head:
+            yield head
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > settings.max_file_size:
+                raise UploadTooLargeError(f"File exceeds {settings.max_file_size} bytes")
+            yield chunk
+
+    return content_type, guarded()
+
+async def store_uploads(request: Request) -> List[StoredUpload]:
+    """Stream every file in a multipart request into the media store.
+
+    Files go chunk by chunk into GridFS, hashed on the way, and are checked
+    against ``allowed_file_types`` (by content, not by the client's claimed
+    type) and ``max_file_size`` as they arrive. A rejected file aborts its
+    partial upload and the rest of the body is never read; files stored
+    before it are kept, being content-addressed and harmless.
+    """
+    max_body_size = settings.max_upload_files * settings.max_file_size + MULTIPART_OVERHEAD
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body_size:
+        raise UploadTooLargeError("Upload exceeds the maximum request size")
+
+    stored: List[StoredUpload] = []
+    async for part in MultipartStream(request, max_body_size).parts():
+        if part.filename is None:
+            # Plain form fields carry nothing we use
+            continue
+        if len(stored) >= settings.max_upload_files:
+            raise UploadTooLargeError(f"At most {settings.max_upload_files} files per upload")
+
+        content_type, chunks = await limited_file(part.chunks())
+        digest, size, created = await media_store.store_stream(chunks, content_type)
+        stored.append(StoredUpload(part.filename, digest, content_type, size, created))
+
+    if not stored:
+        raise UploadError("No files in upload")
+    return stored
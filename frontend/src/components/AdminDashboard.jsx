@@ -29,7 +29,7 @@ const AdminDashboard = ({ className = "" }) => {
       // Load recent contacts
       const contactsResponse = await fetch(`${backendUrl}/api/contact?limit=10`);
       const contactsData = await contactsResponse.json();
-      setContacts(Array.isArray(contactsData) ? contactsData : []);
+      setContacts(Array.isArray(contactsData.items) ? contactsData.items : []);
 
     } catch (error) {
       console.error('Error loading dashboard data:', error);
@@ -64,8 +64,9 @@ const AdminDashboard = ({ className = "" }) => {
       
       switch (type) {
         case 'contacts':
-          endpoint = '/api/contact';
-          break;
+          // Streamed by the backend straight into the browser's download
+          window.location.href = `${backendUrl}/api/export/contacts?format=csv`;
+          return;
         case 'analytics':
           endpoint = '/api/analytics/summary';
           break;
@@ -84,7 +84,7 @@ const MatrixChatSystem = ({ className = "" }) => {
 
     try {
       const backendUrl = process.env.REACT_APP_BACKEND_URL;
-      const response = await fetch(`${backendUrl}/api/chat/message`, {
+      const response = await fetch(`${backendUrl}/api/chat/message/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -95,30 +95,46 @@ const MatrixChatSystem = ({ className = "" }) => {
         })
       });
 
-      const result = await response.json();
-      
-      // Remove typing indicator
-      setMessages(prev => prev.filter(msg => !msg.typing));
-      setIsTyping(false);
+      if (!response.ok || !response.body) {
+        throw new Error(`Stream failed with status ${response.status}`);
+      }
 
-      if (result.success) {
-        const botMessage = {
-          id: Date.now() + 2,
-          type: 'bot',
-          message: `> ${result.data.response}`,
-          timestamp: new Date(),
-          typing: false
-        };
-        setMessages(prev => [...prev, botMessage]);
-      } else {
-        const errorMessage = {
-          id: Date.now() + 2,
-          type: 'bot',
-          message: '> ERROR: Connection to AI matrix failed. Please try again.',
-          timestamp: new Date(),
-          typing: false
-        };
-        setMessages(prev => [...prev, errorMessage]);
+      // Replace the typing indicator with the reply as tokens arrive
+      const botMessageId = Date.now() + 2;
+      let reply = '';
+      let failed = false;
+      const showReply = (text) => {
+        setMessages(prev => [
+          ...prev.filter(msg => !msg.typing && msg.id !== botMessageId),
+          { id: botMessageId, type: 'bot', message: text, timestamp: new Date(), typing: false }
+        ]);
+      };
+
+      // Server-Sent Events: "event: <name>\ndata: <json>\n\n"
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = raw.match(/^data: (.*)$/m)?.[1];
+          if (event === 'token' && data) {
+            reply += JSON.parse(data).text;
+            showReply(`> ${reply}`);
+          } else if (event === 'error') {
+            failed = true;
+          }
+        }
+      }
+
+      setIsTyping(false);
+      if (failed || !reply) {
+        showReply('> ERROR: Connection to AI matrix failed. Please try again.');
       }
     } catch (error) {
       // Remove typing indicator
@@ -0,0 +1,50 @@
+from pathlib import Path
+import asyncio
+import csv
+import io
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from models import ExportCollection, ExportFormat
+from services.export_service import stream_export
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        return FakeCursor(self.docs)
+
+def export_csv(docs):
+    async def collect():
+        db = {"contact_forms": FakeCollection(docs)}
+        return b"".join([chunk async for chunk in stream_export(db, ExportCollection.CONTACTS, {}, ExportFormat.CSV)])
+    return list(csv.DictReader(io.StringIO(asyncio.run(collect()).decode())))
+
+def test_csv_export_neutralizes_formulas():
+    rows = export_csv([{
+        "id": "1",
+        "name": "=1+1",
+        "email": "lead@example.com",
+        "phone": "+971 50 000 0000",
+        "message": "@SUM(A1:A2)",
+    }])
+    assert rows[0]["name"] == "'=1+1"
+    assert rows[0]["phone"] == "'+971 50 000 0000"
+    assert rows[0]["message"] == "'@SUM(A1:A2)"
+    assert rows[0]["email"] == "lead@example.com"